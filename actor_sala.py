@@ -0,0 +1,130 @@
+# backend/actor_sala.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metricas import HistogramaLatencia
+
+_FIN = object()
+
+
+class ActorSala:
+    """
+    Una tarea por sala que procesa sus eventos de a uno, en orden de llegada.
+    Todo lo que modifica una sala (WS, HTTP, temporizadores) pasa por aquí,
+    así no se intercalan en cada await y no hacen falta locks; salas
+    distintas siguen corriendo en paralelo.
+    """
+
+    def __init__(self, sala_id: str):
+        self.sala_id = sala_id
+        self._buzon: asyncio.Queue = asyncio.Queue()
+        self._tarea = asyncio.create_task(self._ciclo())
+        self._detenido = False
+        self.procesados = 0
+        self.tiempos = HistogramaLatencia(max_muestras=256)
+
+    @property
+    def profundidad(self) -> int:
+        return self._buzon.qsize()
+
+    def es_propio(self) -> bool:
+        return asyncio.current_task() is self._tarea
+
+    def enviar(self, funcion: Callable[..., Awaitable], *args) -> asyncio.Future:
+        futuro = asyncio.get_running_loop().create_future()
+        if self._detenido:
+            # actor ya retirado: el evento no se procesaría nunca
+            futuro.cancel()
+            return futuro
+        self._buzon.put_nowait((funcion, args, futuro))
+        return futuro
+
+    async def ejecutar(self, funcion: Callable[..., Awaitable], *args) -> Any:
+        # desde un evento de la misma sala: ya estamos serializados
+        if self.es_propio():
+            return await funcion(*args)
+        futuro = self.enviar(funcion, *args)
+        # con wait (y no await) cancelar a quien espera no cancela el evento, y un
+        # evento que quedó detrás del cierre (futuro cancelado) devuelve None
+        await asyncio.wait([futuro])
+        return None if futuro.cancelled() else futuro.result()
+
+    def detener(self):
+        self._detenido = True
+        self._buzon.put_nowait(_FIN)
+
+    async def _ciclo(self):
+        while True:
+            item = await self._buzon.get()
+            if item is _FIN:
+                break
+
+            funcion, args, futuro = item
+            inicio = time.perf_counter()
+            try:
+                resultado = await funcion(*args)
+                if not futuro.done():
+                    futuro.set_result(resultado)
+            except Exception as e:
+                logging.error(f"Error procesando evento en sala {self.sala_id}: {e}")
+                if not futuro.done():
+                    futuro.set_exception(e)
+            finally:
+                self.procesados += 1
+                self.tiempos.registrar(time.perf_counter() - inicio)
+
+        # lo que quedó encolado después del cierre ya no tiene sala
+        while not self._buzon.empty():
+            item = self._buzon.get_nowait()
+            if item is not _FIN and not item[2].done():
+                item[2].cancel()
+
+
+class SistemaActores:
+    def __init__(self):
+        self._actores: Dict[str, ActorSala] = {}
+        self.eventos_totales = 0
+
+    def actor(self, sala_id: str, crear: bool = True) -> Optional[ActorSala]:
+        actor = self._actores.get(sala_id)
+        if actor is None and crear:
+            actor = self._actores[sala_id] = ActorSala(sala_id)
+        return actor
+
+    async def ejecutar(self, sala_id: str, funcion: Callable[..., Awaitable], *args, crear: bool = True) -> Any:
+        """Con crear=False y sin actor vivo (sala inexistente o ya retirada) no se ejecuta y devuelve None."""
+        actor = self.actor(sala_id, crear)
+        if actor is None:
+            return None
+        self.eventos_totales += 1
+        return await actor.ejecutar(funcion, *args)
+
+    def enviar(self, sala_id: str, funcion: Callable[..., Awaitable], *args,
+               crear: bool = True) -> Optional[asyncio.Future]:
+        """Sin esperar el resultado (temporizadores). Los errores se registran en el actor."""
+        actor = self.actor(sala_id, crear)
+        if actor is None:
+            return None
+        self.eventos_totales += 1
+        futuro = actor.enviar(funcion, *args)
+        futuro.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return futuro
+
+    def retirar(self, sala_id: str):
+        actor = self._actores.pop(sala_id, None)
+        if actor:
+            actor.detener()
+
+    def metricas(self, limite: Optional[int] = 20) -> dict:
+        actores = sorted(self._actores.values(), key=lambda a: a.profundidad, reverse=True)
+        return {
+            "actores": len(self._actores),
+            "eventos_totales": self.eventos_totales,
+            "buzon_total": sum(a.profundidad for a in actores),
+            "salas": {
+                a.sala_id: {"buzon": a.profundidad, "procesados": a.procesados, "tiempo": a.tiempos.resumen()}
+                for a in actores[:limite]
+            },
+        }
@@ -0,0 +1,87 @@
+# backend/afinidad.py
+import bisect
+import hashlib
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from config import AFINIDAD_WORKER_ID, AFINIDAD_WORKERS
+
+
+def _hash(clave: str) -> int:
+    return int.from_bytes(hashlib.blake2b(clave.encode(), digest_size=8).digest(), "big")
+
+
+class AnilloConsistente:
+    """
+    Hashing consistente de salas a workers: cada worker pone `replicas`
+    puntos en el anillo y una clave pertenece al primer punto a su derecha.
+    Agregar o quitar un worker solo mueve ~1/N de las salas.
+    """
+
+    def __init__(self, workers: List[str], replicas: int = 100):
+        self.workers = list(workers)
+        puntos: List[Tuple[int, str]] = sorted(
+            (_hash(f"{w}#{r}"), w) for w in self.workers for r in range(replicas)
+        )
+        self._hashes = [h for h, _ in puntos]
+        self._propietarios = [w for _, w in puntos]
+
+    def propietario(self, clave: str) -> str:
+        i = bisect.bisect(self._hashes, _hash(clave)) % len(self._hashes)
+        return self._propietarios[i]
+
+
+def nombres_workers(total: int) -> List[str]:
+    return [f"w{i}" for i in range(total)]
+
+
+# rutas con sala en el path: /ws/{sala_id}/{jugador_id} y /sala/{sala_id}/...
+_RUTA_WS = re.compile(r"^/ws/([^/]+)/")
+_RUTA_SALA = re.compile(r"^/sala/([^/]+)/")
+
+
+def clave_de_ruta(objetivo: str) -> Optional[str]:
+    """
+    Clave de afinidad de una petición HTTP/WS: el sala_id o el código de sala.
+    /sala/crear se reparte por jugador (el worker elegido crea una sala suya).
+    El resto (auth, estadísticas, ...) no tiene dueño: None.
+    """
+    partes = urlsplit(objetivo)
+    ruta = partes.path
+
+    m = _RUTA_WS.match(ruta)
+    if m:
+        return m.group(1)
+
+    if ruta == "/sala/unir":
+        codigo = parse_qs(partes.query).get("codigo_sala")
+        return codigo[0] if codigo else None
+
+    if ruta == "/sala/crear":
+        jugador = parse_qs(partes.query).get("jugador_id")
+        return jugador[0] if jugador else None
+
+    m = _RUTA_SALA.match(ruta)
+    if m:
+        return m.group(1)
+
+    return None
+
+
+class AfinidadLocal:
+    """
+    Lo que necesita saber un worker detrás del despachador: cuál es y si una
+    clave (sala_id o código) le pertenece. Sin AFINIDAD_WORKERS todo es propio.
+    """
+
+    def __init__(self, worker_id: Optional[str] = AFINIDAD_WORKER_ID, total: int = AFINIDAD_WORKERS):
+        self.worker_id = worker_id
+        self.anillo = AnilloConsistente(nombres_workers(total)) if worker_id and total > 1 else None
+
+    @property
+    def activa(self) -> bool:
+        return self.anillo is not None
+
+    def es_propia(self, clave: str) -> bool:
+        return self.anillo is None or self.anillo.propietario(clave) == self.worker_id
@@ -0,0 +1,71 @@
+# backend/bench_base_datos.py
+"""
+Benchmark: cuánto se traba el event loop con BaseDatos (pymongo directo)
+contra BaseDatosAsync (pool de hilos), con N lecturas concurrentes.
+
+Uso:
+    python bench_base_datos.py [concurrencia] [operaciones_por_tarea]
+
+Usa MONGODB_URI (igual que el servidor). Solo hace lecturas.
+"""
+import asyncio
+import sys
+import time
+
+from database import BaseDatos, BaseDatosAsync
+from metricas import HistogramaLatencia
+
+
+async def _medir_retraso_loop(historial: HistogramaLatencia, parar: asyncio.Event, intervalo: float = 0.005):
+    # un tick que debería despertar cada `intervalo`; lo que se pasa es bloqueo del loop
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        historial.registrar(max(0.0, time.perf_counter() - inicio - intervalo))
+
+
+async def _correr(nombre: str, operacion, concurrencia: int, repeticiones: int):
+    retraso = HistogramaLatencia(max_muestras=100_000)
+    latencia = HistogramaLatencia(max_muestras=100_000)
+    parar = asyncio.Event()
+    monitor = asyncio.create_task(_medir_retraso_loop(retraso, parar))
+
+    async def tarea(n: int):
+        for i in range(repeticiones):
+            inicio = time.perf_counter()
+            await operacion(f"jugador_bench_{n}_{i}")
+            latencia.registrar(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(tarea(n) for n in range(concurrencia)))
+    total = time.perf_counter() - inicio
+
+    parar.set()
+    await monitor
+
+    ops = concurrencia * repeticiones
+    print(f"\n== {nombre} ==")
+    print(f"operaciones: {ops}  tiempo: {total:.2f}s  ops/s: {ops / total:.1f}")
+    print(f"latencia operación: {latencia.resumen()}")
+    print(f"retraso event loop: {retraso.resumen()}")
+
+
+async def main():
+    concurrencia = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    sincrona = BaseDatos()
+    asincrona = BaseDatosAsync(sincrona)
+
+    async def bloqueante(jugador_id: str):
+        # así estaba antes: llamada pymongo directa dentro de un async def
+        return sincrona.obtener_jugador(jugador_id)
+
+    await _correr("BaseDatos (bloqueante)", bloqueante, concurrencia, repeticiones)
+    await _correr("BaseDatosAsync (pool de hilos)", asincrona.obtener_jugador, concurrencia, repeticiones)
+
+    await asincrona.cerrar()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,197 @@
+# backend/bus_salas.py
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import BUS_SALAS, BUS_DIR
+from metricas import HistogramaLatencia
+
+# entrega(sala_id, texto, clase): reparte a los sockets locales de la sala
+Entrega = Callable[[str, str, str], None]
+
+
+class BusSalas:
+    """
+    Bus de mensajes por sala. Cada mensaje se publica una vez y se entrega
+    a las conexiones locales de cada proceso que tenga jugadores de esa sala.
+    Las clases con suscriptor no van a sockets: son avisos entre workers
+    (p.ej. invalidar una caché) y las recibe ese suscriptor en cada proceso.
+    """
+
+    def __init__(self):
+        self._entrega: Optional[Entrega] = None
+        self._suscriptores: Dict[str, Entrega] = {}
+        self.publicados = 0
+
+    def conectar(self, entrega: Entrega):
+        self._entrega = entrega
+
+    def suscribir(self, clase: str, manejador: Entrega):
+        self._suscriptores[clase] = manejador
+
+    def _entregar(self, sala_id: str, texto: str, clase: str):
+        manejador = self._suscriptores.get(clase, self._entrega)
+        if manejador:
+            manejador(sala_id, texto, clase)
+
+    def publicar(self, sala_id: str, texto: str, clase: str):
+        self.publicados += 1
+        self._entregar(sala_id, texto, clase)
+
+    async def iniciar(self):
+        pass
+
+    async def cerrar(self):
+        pass
+
+    def metricas(self) -> dict:
+        return {"tipo": "local", "publicados": self.publicados}
+
+
+class BusLocal(BusSalas):
+    """Un solo proceso: publicar es entregar directo."""
+
+
+class BusUnix(BusSalas):
+    """
+    Varios workers en la misma máquina: cada proceso escucha en un socket
+    Unix de datagramas dentro de BUS_DIR y publicar es un sendto() a cada
+    uno (no bloqueante; si el buffer del otro está lleno el mensaje se pierde
+    para ese worker, igual que un cliente lento). El propio proceso entrega
+    directo sin pasar por el socket.
+    Cada datagrama lleva la hora de envío para medir la latencia por salto.
+    """
+
+    REFRESCO_PARES = 1.0
+
+    def __init__(self, directorio: str = BUS_DIR):
+        super().__init__()
+        self.directorio = directorio
+        self.origen = f"{socket.gethostname()}_{os.getpid()}"
+        self._ruta = os.path.join(directorio, f"{self.origen}.sock")
+
+        self._receptor: Optional[socket.socket] = None
+        self._emisor: Optional[socket.socket] = None
+        self._pares: List[str] = []
+        self._pares_leidos = 0.0
+
+        self._latencia = HistogramaLatencia()
+        self.recibidos = 0
+        self.perdidos = 0
+
+    # ======================================================
+    # ================   CICLO DE VIDA   ===================
+    # ======================================================
+    async def iniciar(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        try:
+            os.unlink(self._ruta)
+        except FileNotFoundError:
+            pass
+
+        self._receptor = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receptor.bind(self._ruta)
+        self._receptor.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._receptor.fileno(), self._leer)
+        logging.info(f"Bus de salas escuchando en {self._ruta}")
+
+    async def cerrar(self):
+        if self._receptor:
+            asyncio.get_running_loop().remove_reader(self._receptor.fileno())
+            self._receptor.close()
+            self._receptor = None
+            try:
+                os.unlink(self._ruta)
+            except FileNotFoundError:
+                pass
+        if self._emisor:
+            self._emisor.close()
+            self._emisor = None
+
+    # ======================================================
+    # ================   PUBLICAR   ========================
+    # ======================================================
+    def publicar(self, sala_id: str, texto: str, clase: str):
+        super().publicar(sala_id, texto, clase)
+
+        pares = self._pares_actuales()
+        if not pares:
+            return
+
+        if self._emisor is None:
+            self._emisor = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._emisor.setblocking(False)
+
+        datagrama = f"{time.time()}\n{sala_id}\n{clase}\n{self.origen}\n{texto}".encode()
+        for ruta in pares:
+            try:
+                self._emisor.sendto(datagrama, ruta)
+            except BlockingIOError:
+                self.perdidos += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # worker muerto que dejó su socket
+                self._olvidar_par(ruta)
+            except OSError as e:
+                self.perdidos += 1
+                logging.warning(f"No se pudo publicar en {ruta}: {e}")
+
+    def _pares_actuales(self) -> List[str]:
+        ahora = time.monotonic()
+        if ahora - self._pares_leidos > self.REFRESCO_PARES:
+            self._pares_leidos = ahora
+            try:
+                self._pares = [
+                    os.path.join(self.directorio, nombre)
+                    for nombre in os.listdir(self.directorio)
+                    if nombre.endswith(".sock") and os.path.join(self.directorio, nombre) != self._ruta
+                ]
+            except FileNotFoundError:
+                self._pares = []
+        return self._pares
+
+    def _olvidar_par(self, ruta: str):
+        try:
+            self._pares.remove(ruta)
+            os.unlink(ruta)
+        except (ValueError, OSError):
+            pass
+
+    # ======================================================
+    # ================   RECIBIR   =========================
+    # ======================================================
+    def _leer(self):
+        while True:
+            try:
+                datos = self._receptor.recv(1 << 18)
+            except (BlockingIOError, OSError):
+                return
+
+            try:
+                enviado, sala_id, clase, _, texto = datos.decode().split("\n", 4)
+            except ValueError:
+                logging.warning("Datagrama de bus mal formado")
+                continue
+
+            self.recibidos += 1
+            self._latencia.registrar(max(0.0, time.time() - float(enviado)))
+            self._entregar(sala_id, texto, clase)
+
+    def metricas(self) -> dict:
+        return {
+            "tipo": "unix",
+            "origen": self.origen,
+            "pares": len(self._pares),
+            "publicados": self.publicados,
+            "recibidos": self.recibidos,
+            "perdidos": self.perdidos,
+            "latencia_salto": self._latencia.resumen(),
+        }
+
+
+def crear_bus(tipo: str = BUS_SALAS) -> BusSalas:
+    if tipo == "unix":
+        return BusUnix()
+    return BusLocal()
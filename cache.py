@@ -0,0 +1,101 @@
+# backend/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class CacheLRU:
+    """
+    Caché en memoria acotada (LRU) con vencimiento por TTL.
+
+    `obtener(clave, cargar)` devuelve el valor guardado o llama a `cargar()`.
+    Si varias corrutinas fallan a la vez en la misma clave, solo una carga y el
+    resto espera ese mismo resultado (single-flight). Un `invalidar()` durante
+    la carga hace que el resultado no se guarde.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._en_vuelo: Dict[Hashable, asyncio.Future] = {}
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.compartidos = 0
+        self.expirados = 0
+        self.desalojados = 0
+        self.invalidaciones = 0
+
+    def _leer(self, clave: Hashable) -> Tuple[bool, Any]:
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return False, None
+        vence, valor = entrada
+        if vence < time.monotonic():
+            del self._datos[clave]
+            self.expirados += 1
+            return False, None
+        self._datos.move_to_end(clave)
+        return True, valor
+
+    def guardar(self, clave: Hashable, valor: Any):
+        self._datos[clave] = (time.monotonic() + self.ttl, valor)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+            self.desalojados += 1
+
+    def invalidar(self, clave: Hashable):
+        self.invalidaciones += 1
+        self._datos.pop(clave, None)
+        self._en_vuelo.pop(clave, None)
+
+    async def obtener(self, clave: Hashable, cargar: Callable[[], Awaitable[Any]]) -> Any:
+        encontrado, valor = self._leer(clave)
+        if encontrado:
+            self.aciertos += 1
+            return valor
+
+        futuro = self._en_vuelo.get(clave)
+        if futuro is not None:
+            self.compartidos += 1
+            return await asyncio.shield(futuro)
+
+        self.fallos += 1
+        futuro = self._en_vuelo[clave] = asyncio.get_running_loop().create_future()
+        try:
+            valor = await cargar()
+        except BaseException as e:
+            if self._en_vuelo.get(clave) is futuro:
+                del self._en_vuelo[clave]
+            if isinstance(e, asyncio.CancelledError):
+                futuro.cancel()
+            else:
+                futuro.set_exception(e)
+                # los que esperan ya la reciben; evita el aviso de "never retrieved"
+                futuro.exception()
+            raise
+
+        if self._en_vuelo.get(clave) is futuro:
+            del self._en_vuelo[clave]
+            if valor is not None:
+                self.guardar(clave, valor)
+        futuro.set_result(valor)
+        return valor
+
+    def metricas(self) -> dict:
+        consultas = self.aciertos + self.compartidos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "ttl": self.ttl,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "compartidos": self.compartidos,
+            "expirados": self.expirados,
+            "desalojados": self.desalojados,
+            "invalidaciones": self.invalidaciones,
+            "tasa_aciertos": round((self.aciertos + self.compartidos) / consultas, 4) if consultas else 0.0,
+        }
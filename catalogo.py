@@ -0,0 +1,135 @@
+# backend/catalogo.py
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional
+
+from config import CATALOGO_INTERVALO
+from frases import IndiceFrases, normalizar_texto
+from models import Frase
+
+# fallback hardcodeado (si MongoDB no responde en la primera carga)
+FRASES_RESPALDO = [
+    "La sombra avanzaba silenciosa por el pasillo.",
+    "Al abrir la puerta, nadie respondió al llamado.",
+    "El susurro decía mi nombre al oído sin moverse nadie.",
+    "Las luces titilaron y la figura estaba ya detrás de mí.",
+    "No había teléfonos en la casa, pero alguien marcó desde adentro.",
+    "Encontré una nota en mi almohada que decía: vuelve a dormir.",
+    "El espejo reflejó una habitación que no era la mía.",
+    "Cada vez que parpadeaba, alguien estaba más cerca.",
+    "La casa respiraba y yo no estaba dentro de ella.",
+    "Las marcas en la pared formaban mi nombre al revés."
+]
+
+
+def frases_desde_documentos(documentos: List[dict]) -> List[Frase]:
+    frases = []
+    for i, frase in enumerate(documentos):
+        mongo_id = frase.get("_id")
+        frases.append(Frase(
+            id=str(mongo_id) if mongo_id else str(i),
+            texto=normalizar_texto(frase.get("texto") or ""),
+            dificultad=frase.get("dificultad") or "media",
+            categoria=frase.get("categoria") or "terror"
+        ))
+    return frases
+
+
+def frases_respaldo() -> List[Frase]:
+    return [
+        Frase(id=str(i), texto=txt, dificultad="media", categoria="terror")
+        for i, txt in enumerate(FRASES_RESPALDO)
+    ]
+
+
+class CatalogoFrases:
+    """
+    Catálogo de frases recargable en caliente.
+    Cada `intervalo` segundos consulta una firma barata de la colección
+    (sustituto de un change stream) y, si cambió, vuelve a cargar todo con
+    proyección, arma el IndiceFrases nuevo fuera del loop y lo reemplaza de
+    una vez. Las rondas en curso conservan su frase (y su FraseCompilada).
+    """
+
+    def __init__(self, base_datos, intervalo: float = CATALOGO_INTERVALO):
+        self.base_datos = base_datos
+        self.intervalo = intervalo
+
+        # respaldo desde el primer momento: se puede jugar antes de que MongoDB responda
+        self._indice = IndiceFrases(frases_respaldo())
+        self._firma: Optional[Any] = None
+        self._tarea: Optional[asyncio.Task] = None
+
+        self.recargas = 0
+        self.ultima_carga_s = 0.0
+        self.desde_respaldo = True
+
+    @property
+    def indice(self) -> IndiceFrases:
+        return self._indice
+
+    # ======================================================
+    # ================   CARGA   ===========================
+    # ======================================================
+    async def cargar(self) -> bool:
+        """Primera carga (en el arranque, en segundo plano). Hasta entonces se usa el respaldo."""
+        return await self.recargar(forzar=True)
+
+    async def recargar(self, forzar: bool = False) -> bool:
+        try:
+            firma = await self.base_datos.firma_frases()
+            if not forzar and firma == self._firma and not self.desde_respaldo:
+                return False
+
+            inicio = time.time()
+            documentos = await self.base_datos.obtener_frases_terror()
+            loop = asyncio.get_running_loop()
+            # compilar decenas de miles de frases es CPU: se hace en un hilo,
+            # también los modelos Frase: armarlos en el loop ya es una pausa larga
+            indice = await loop.run_in_executor(None, lambda: IndiceFrases(frases_desde_documentos(documentos)))
+        except Exception as e:
+            logging.error(f"No se pudo recargar el catálogo de frases: {e}")
+            return False
+
+        if not len(indice):
+            logging.warning("Recarga de frases vacía, se mantiene el catálogo actual")
+            return False
+
+        self._indice = indice
+        self._firma = firma
+        self.desde_respaldo = False
+        self.recargas += 1
+        self.ultima_carga_s = time.time() - inicio
+        logging.info(f"✔ Catálogo de frases recargado: {len(indice)} frases ({self.ultima_carga_s:.3f}s)")
+        return True
+
+    # ======================================================
+    # ================   REFRESCO   ========================
+    # ======================================================
+    async def _ciclo(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            await self.recargar()
+
+    def iniciar(self):
+        if self.intervalo > 0 and (self._tarea is None or self._tarea.done()):
+            self._tarea = asyncio.create_task(self._ciclo())
+
+    async def cerrar(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+    def metricas(self) -> dict:
+        return {
+            "frases": len(self._indice),
+            "recargas": self.recargas,
+            "ultima_carga_s": round(self.ultima_carga_s, 3),
+            "desde_respaldo": self.desde_respaldo,
+            "intervalo": self.intervalo,
+        }
@@ -0,0 +1,337 @@
+# backend/clasificacion.py
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import CLASIFICACION_INTERVALO, CLASIFICACION_MIN_PARTIDAS
+
+
+# ======================================================
+# ================   LISTA DE SALTOS   =================
+# ======================================================
+class _Nodo:
+    __slots__ = ("clave", "siguientes", "anchos")
+
+    def __init__(self, clave: Any, niveles: int):
+        self.clave = clave
+        self.siguientes: List[Optional["_Nodo"]] = [None] * niveles
+        # anchos[i]: cuántas posiciones del nivel 0 se saltan al seguir siguientes[i]
+        self.anchos: List[int] = [1] * niveles
+
+
+class ListaSaltos:
+    """
+    Lista de saltos indexable: claves ordenadas con insertar, quitar, posición
+    de una clave y acceso por posición, todo en O(log n) esperado. Cada enlace
+    guarda cuántos elementos salta, así la posición se suma al bajar.
+    """
+
+    MAX_NIVEL = 16
+    P = 0.25
+
+    def __init__(self):
+        self._cabeza = _Nodo(None, self.MAX_NIVEL)
+        self._largo = 0
+
+    def __len__(self) -> int:
+        return self._largo
+
+    def _nivel_aleatorio(self) -> int:
+        nivel = 1
+        while nivel < self.MAX_NIVEL and random.random() < self.P:
+            nivel += 1
+        return nivel
+
+    def insertar(self, clave: Any):
+        previos: List[_Nodo] = [self._cabeza] * self.MAX_NIVEL
+        posiciones = [0] * self.MAX_NIVEL
+        x, pos = self._cabeza, 0
+        for i in reversed(range(self.MAX_NIVEL)):
+            while x.siguientes[i] is not None and x.siguientes[i].clave < clave:
+                pos += x.anchos[i]
+                x = x.siguientes[i]
+            previos[i], posiciones[i] = x, pos
+
+        nuevo = _Nodo(clave, self._nivel_aleatorio())
+        for i in range(len(nuevo.siguientes)):
+            previo = previos[i]
+            saltados = pos - posiciones[i]
+            nuevo.siguientes[i] = previo.siguientes[i]
+            nuevo.anchos[i] = previo.anchos[i] - saltados
+            previo.siguientes[i] = nuevo
+            previo.anchos[i] = saltados + 1
+        for i in range(len(nuevo.siguientes), self.MAX_NIVEL):
+            previos[i].anchos[i] += 1
+        self._largo += 1
+
+    def quitar(self, clave: Any):
+        previos: List[_Nodo] = [self._cabeza] * self.MAX_NIVEL
+        x = self._cabeza
+        for i in reversed(range(self.MAX_NIVEL)):
+            while x.siguientes[i] is not None and x.siguientes[i].clave < clave:
+                x = x.siguientes[i]
+            previos[i] = x
+
+        objetivo = x.siguientes[0]
+        if objetivo is None or objetivo.clave != clave:
+            raise KeyError(clave)
+
+        for i in range(self.MAX_NIVEL):
+            previo = previos[i]
+            if previo.siguientes[i] is objetivo:
+                previo.anchos[i] += objetivo.anchos[i] - 1
+                previo.siguientes[i] = objetivo.siguientes[i]
+            else:
+                previo.anchos[i] -= 1
+        self._largo -= 1
+
+    def posicion(self, clave: Any) -> Optional[int]:
+        """Posición (desde 1) de la clave, o None si no está."""
+        x, pos = self._cabeza, 0
+        for i in reversed(range(self.MAX_NIVEL)):
+            while x.siguientes[i] is not None and x.siguientes[i].clave < clave:
+                pos += x.anchos[i]
+                x = x.siguientes[i]
+        siguiente = x.siguientes[0]
+        return pos + 1 if siguiente is not None and siguiente.clave == clave else None
+
+    def desde(self, indice: int) -> Iterator[Any]:
+        """Claves en orden a partir de la posición `indice` (desde 0)."""
+        if indice >= self._largo:
+            return
+        x, pos = self._cabeza, 0
+        for i in reversed(range(self.MAX_NIVEL)):
+            while x.siguientes[i] is not None and pos + x.anchos[i] <= indice + 1:
+                pos += x.anchos[i]
+                x = x.siguientes[i]
+        while x is not None:
+            yield x.clave
+            x = x.siguientes[0]
+
+
+# ======================================================
+# ================   CLASIFICACIONES   =================
+# ======================================================
+TIPOS = ("ppm", "victorias", "tasa_victorias")
+
+
+def _valores(fila: dict, minimo_partidas: int) -> Dict[str, float]:
+    """Puntaje de un jugador en cada tabla (las que no le corresponden, ausentes)."""
+    jugadas = fila.get("partidas_jugadas", 0)
+    ganadas = fila.get("partidas_ganadas", 0)
+    valores = {"victorias": ganadas}
+    if fila.get("mejor_ppm"):
+        valores["ppm"] = fila["mejor_ppm"]
+    if jugadas >= minimo_partidas:
+        valores["tasa_victorias"] = round(ganadas / jugadas, 4)
+    for dificultad, ppm in (fila.get("mejor_ppm_dificultad") or {}).items():
+        if ppm:
+            valores[f"ppm:{dificultad}"] = ppm
+    return valores
+
+
+class TablasClasificacion:
+    """Una ListaSaltos por tabla, con clave (-puntaje, jugador_id): la mejor primero."""
+
+    def __init__(self, minimo_partidas: int):
+        self.minimo_partidas = minimo_partidas
+        self.tablas: Dict[str, ListaSaltos] = {}
+        self.claves: Dict[str, Dict[str, Tuple[float, str]]] = {}
+        self.filas: Dict[str, dict] = {}
+
+    def actualizar(self, fila: dict):
+        jugador_id = fila["jugador_id"]
+        self.filas[jugador_id] = fila
+        valores = _valores(fila, self.minimo_partidas)
+
+        for tabla in set(valores) | {t for t, c in self.claves.items() if jugador_id in c}:
+            claves = self.claves.setdefault(tabla, {})
+            lista = self.tablas.setdefault(tabla, ListaSaltos())
+            nueva = (-valores[tabla], jugador_id) if tabla in valores else None
+            vieja = claves.get(jugador_id)
+            if vieja == nueva:
+                continue
+            if vieja is not None:
+                lista.quitar(vieja)
+                del claves[jugador_id]
+            if nueva is not None:
+                lista.insertar(nueva)
+                claves[jugador_id] = nueva
+
+
+class Clasificaciones:
+    """
+    Tablas de posiciones globales (mejor PPM, victorias, % de victorias y mejor
+    PPM por dificultad) en memoria. Se arman una vez desde la colección
+    `estadisticas` y después se actualizan con las filas que devuelve MongoDB
+    al acumular cada partida de este proceso; con varios workers, cada
+    `intervalo` segundos se traen solo las filas con `ultima_partida` posterior
+    a la última sincronización, para ver también las partidas de los demás.
+    """
+
+    # las fechas las pone cada worker: se relee un margen hacia atrás por si
+    # otro escribió tarde una partida con fecha anterior (reaplicar es inocuo)
+    SOLAPE = timedelta(seconds=60)
+
+    def __init__(self, base_datos, intervalo: float = CLASIFICACION_INTERVALO,
+                 minimo_partidas: int = CLASIFICACION_MIN_PARTIDAS):
+        self.base_datos = base_datos
+        self.intervalo = intervalo
+        self.minimo_partidas = minimo_partidas
+
+        self._tablas = TablasClasificacion(minimo_partidas)
+        self._tarea: Optional[asyncio.Task] = None
+
+        self._sincronizado_hasta: Optional[datetime] = None
+
+        self.cargas = 0
+        self.ultima_carga_s = 0.0
+        self.sincronizaciones = 0
+        self.filas_sincronizadas = 0
+        self.ultima_sincronizacion_s = 0.0
+        self.partidas_registradas = 0
+
+    # ======================================================
+    # ================   CARGA   ===========================
+    # ======================================================
+    def _construir(self, filas: List[dict]) -> TablasClasificacion:
+        tablas = TablasClasificacion(self.minimo_partidas)
+        for fila in filas:
+            tablas.actualizar(fila)
+        return tablas
+
+    async def recargar(self) -> bool:
+        try:
+            inicio = time.time()
+            filas = await self.base_datos.obtener_filas_estadisticas()
+            loop = asyncio.get_running_loop()
+            # millones de inserciones: fuera del loop
+            tablas = await loop.run_in_executor(None, self._construir, filas)
+        except Exception as e:
+            logging.error(f"No se pudieron cargar las clasificaciones: {e}")
+            return False
+
+        self._tablas = tablas
+        self._avanzar_marca(filas)
+        self.cargas += 1
+        self.ultima_carga_s = time.time() - inicio
+        logging.info(f"✔ Clasificaciones cargadas: {len(tablas.filas)} jugadores ({self.ultima_carga_s:.3f}s)")
+        return True
+
+    def _avanzar_marca(self, filas: List[dict]):
+        fechas = [f["ultima_partida"] for f in filas if f.get("ultima_partida")]
+        if fechas:
+            marca = max(fechas)
+            if self._sincronizado_hasta is None or marca > self._sincronizado_hasta:
+                self._sincronizado_hasta = marca
+
+    async def sincronizar(self) -> bool:
+        """Aplica sobre las tablas vigentes solo las filas que cambiaron desde la última vez."""
+        if self._sincronizado_hasta is None:
+            # nunca se cargó (o no había filas): carga completa
+            return await self.recargar()
+        try:
+            inicio = time.time()
+            filas = await self.base_datos.obtener_filas_estadisticas(self._sincronizado_hasta - self.SOLAPE)
+        except Exception as e:
+            logging.error(f"No se pudieron sincronizar las clasificaciones: {e}")
+            return False
+
+        for n, fila in enumerate(filas, 1):
+            self._tablas.actualizar(fila)
+            if n % 1000 == 0:
+                # muchas filas (p.ej. tras una caída larga): no acaparar el loop
+                await asyncio.sleep(0)
+        self._avanzar_marca(filas)
+        self.sincronizaciones += 1
+        self.filas_sincronizadas += len(filas)
+        self.ultima_sincronizacion_s = time.time() - inicio
+        return True
+
+    # ======================================================
+    # ================   ACTUALIZACIÓN   ===================
+    # ======================================================
+    def actualizar_filas(self, filas: List[dict]):
+        """Filas de `estadisticas` tal como quedaron en MongoDB tras acumular una partida."""
+        filas = [f for f in filas if f]
+        for fila in filas:
+            self._tablas.actualizar(fila)
+        if filas:
+            self.partidas_registradas += 1
+
+    # ======================================================
+    # ================   CONSULTAS   =======================
+    # ======================================================
+    @staticmethod
+    def nombre_tabla(tipo: str, dificultad: Optional[str] = None) -> str:
+        return f"{tipo}:{dificultad}" if dificultad and tipo == "ppm" else tipo
+
+    def _entrada(self, posicion: int, clave: Tuple[float, str]) -> dict:
+        puntaje, jugador_id = clave
+        return {
+            "posicion": posicion,
+            "jugador_id": jugador_id,
+            "nombre": self._tablas.filas.get(jugador_id, {}).get("nombre", ""),
+            "valor": -puntaje,
+        }
+
+    def top(self, tabla: str, limite: int = 10, desde: int = 0) -> List[dict]:
+        lista = self._tablas.tablas.get(tabla)
+        if lista is None:
+            return []
+        resultado = []
+        for n, clave in enumerate(lista.desde(desde)):
+            if n >= limite:
+                break
+            resultado.append(self._entrada(desde + n + 1, clave))
+        return resultado
+
+    def posicion(self, tabla: str, jugador_id: str) -> Optional[dict]:
+        clave = self._tablas.claves.get(tabla, {}).get(jugador_id)
+        if clave is None:
+            return None
+        entrada = self._entrada(self._tablas.tablas[tabla].posicion(clave), clave)
+        entrada["total"] = len(self._tablas.tablas[tabla])
+        return entrada
+
+    def total(self, tabla: str) -> int:
+        lista = self._tablas.tablas.get(tabla)
+        return len(lista) if lista else 0
+
+    # ======================================================
+    # ================   CICLO DE VIDA   ===================
+    # ======================================================
+    async def _ciclo(self):
+        # la primera carga la hace el arranque (AdministradorJuego.calentar)
+        while True:
+            await asyncio.sleep(self.intervalo)
+            await self.sincronizar()
+
+    def iniciar(self):
+        if self.intervalo > 0 and (self._tarea is None or self._tarea.done()):
+            self._tarea = asyncio.create_task(self._ciclo())
+
+    async def cerrar(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+    def metricas(self) -> dict:
+        return {
+            "jugadores": len(self._tablas.filas),
+            "tablas": {nombre: len(lista) for nombre, lista in self._tablas.tablas.items()},
+            "cargas": self.cargas,
+            "ultima_carga_s": round(self.ultima_carga_s, 3),
+            "sincronizaciones": self.sincronizaciones,
+            "filas_sincronizadas": self.filas_sincronizadas,
+            "ultima_sincronizacion_s": round(self.ultima_sincronizacion_s, 3),
+            "partidas_registradas": self.partidas_registradas,
+            "intervalo": self.intervalo,
+        }
@@ -0,0 +1,21 @@
+# backend/completar_claves_frases.py
+"""
+Pone `clave` (texto normalizado) a las frases guardadas antes de que existiera,
+para que el índice único también deduplique las importaciones contra ellas.
+
+Hace falta una vez al desplegar, antes de importar frases nuevas. Es
+idempotente; las frases que repiten una clave ya presente quedan sin ella.
+
+Uso:
+    python completar_claves_frases.py
+"""
+import time
+
+from database import BaseDatos
+
+
+if __name__ == "__main__":
+    db = BaseDatos()
+    inicio = time.perf_counter()
+    total = db.completar_claves_frases()
+    print(f"✔ Clave completada en {total} frases en {time.perf_counter() - inicio:.1f}s")
@@ -1,21 +1,88 @@
 # backend/database.py
-from pymongo import MongoClient
+import pymongo
+from pymongo import MongoClient, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from models import Jugador, Sala, Partida, EstadisticasJugador
+from frases import clave_frase
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import CacheLRU
+from config import (
+    MONGO_HILOS, JUGADORES_CACHE_MAX, JUGADORES_CACHE_TTL,
+    MONGO_POOL_MAX, MONGO_POOL_MIN, MONGO_ESPERA_POOL_MS, MONGO_TIMEOUT_SOCKET_MS,
+    MONGO_TIMEOUT_CONEXION_MS, MONGO_TIMEOUT_SELECCION_MS, MONGO_COMPRESION,
+)
+from monitoreo_mongo import MonitorMongo
+
+
+# campos de `estadisticas` que usan las clasificaciones
+CAMPOS_CLASIFICACION = {
+    "_id": 0, "jugador_id": 1, "nombre": 1, "partidas_jugadas": 1, "partidas_ganadas": 1,
+    "mejor_ppm": 1, "mejor_ppm_dificultad": 1, "ultima_partida": 1,
+}
+
+
+def opciones_cliente() -> Dict[str, Any]:
+    """Parámetros del MongoClient según config; lo no configurado queda con el valor del driver."""
+    opciones: Dict[str, Any] = {"maxPoolSize": MONGO_POOL_MAX, "minPoolSize": MONGO_POOL_MIN}
+    for clave, valor in (
+        ("waitQueueTimeoutMS", MONGO_ESPERA_POOL_MS),
+        ("socketTimeoutMS", MONGO_TIMEOUT_SOCKET_MS),
+        ("connectTimeoutMS", MONGO_TIMEOUT_CONEXION_MS),
+        ("serverSelectionTimeoutMS", MONGO_TIMEOUT_SELECCION_MS),
+    ):
+        if valor:
+            opciones[clave] = int(valor)
+    if MONGO_COMPRESION:
+        opciones["compressors"] = MONGO_COMPRESION
+    return opciones
 
 
 class BaseDatos:
-    def __init__(self):
+    def __init__(self, preparar: bool = True):
         self.conexion_string = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 
-        self.cliente = MongoClient(self.conexion_string)
-        self.db = self.cliente.final_sentence
+        # el cliente se crea al primer uso: construir BaseDatos no toca la red
+        self._cliente: Optional[MongoClient] = None
+        self._db = None
+        self._lock_cliente = threading.Lock()
+        # latencia por comando y esperas del pool, alimentadas por el driver
+        self.monitor = MonitorMongo()
+
+        if preparar:
+            self.preparar()
+
+    @property
+    def cliente(self) -> MongoClient:
+        if self._cliente is None:
+            with self._lock_cliente:
+                if self._cliente is None:
+                    self._cliente = MongoClient(
+                        self.conexion_string, event_listeners=self.monitor.listeners, **opciones_cliente()
+                    )
+        return self._cliente
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = self.cliente.final_sentence
+        return self._db
 
+    def preparar(self):
+        """Índices y frases semilla (idempotente)."""
         self._crear_indices()
         self.inicializar_frases_terror()
 
+    def cerrar(self):
+        if self._cliente is not None:
+            self._cliente.close()
+
     # -------------------------------------------------------
     # ÍNDICES
     # -------------------------------------------------------
@@ -25,6 +92,11 @@ class BaseDatos:
         self.db.salas.create_index("id", unique=True)
         self.db.salas.create_index("codigo", unique=True)
         self.db.partidas.create_index("fecha")
+        self.db.estadisticas.create_index("jugador_id", unique=True)
+        # sincronización incremental de las clasificaciones
+        self.db.estadisticas.create_index("ultima_partida")
+        # frases cargadas antes de existir `clave` no la tienen: sparse
+        self.db.frases.create_index("clave", unique=True, sparse=True)
 
     # -------------------------------------------------------
     # FRASES DE TERROR
@@ -46,9 +118,65 @@ class BaseDatos:
             { "texto": "Las marcas en la pared formaban mi nombre, escrito de atrás hacia adelante.", "dificultad": "alta", "categoria": "terror" }
         ]
 
+        ahora = datetime.now()
         for frase in frases:
-            frase["fecha_agregada"] = datetime.now()
-            self.db.frases.insert_one(frase)
+            frase["clave"] = clave_frase(frase["texto"])
+            frase["fecha_agregada"] = ahora
+        self.insertar_frases(frases)
+
+    def completar_claves_frases(self, lote: int = 1000) -> int:
+        """
+        Pone `clave` a las frases cargadas antes de que existiera, así el índice
+        único también deduplica contra ellas. Las que repiten una clave ya
+        presente quedan sin ella. Recorre toda la colección: es una migración
+        (completar_claves_frases.py), no algo del arranque. Devuelve cuántas
+        se completaron.
+        """
+        completadas = 0
+        operaciones = []
+
+        def escribir():
+            try:
+                return self.db.frases.bulk_write(operaciones, ordered=False).modified_count
+            except BulkWriteError as e:
+                if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+                return e.details.get("nModified", 0)
+
+        for frase in self.db.frases.find({"clave": {"$exists": False}}, {"texto": 1}):
+            operaciones.append(UpdateOne({"_id": frase["_id"]}, {"$set": {"clave": clave_frase(frase.get("texto", ""))}}))
+            if len(operaciones) >= lote:
+                completadas += escribir()
+                operaciones = []
+        if operaciones:
+            completadas += escribir()
+        return completadas
+
+    def insertar_frases(self, frases: List[dict]) -> Tuple[int, int]:
+        """Inserta un lote sin orden; las que ya existen (misma `clave`) se saltan. -> (insertadas, duplicadas)"""
+        if not frases:
+            return 0, 0
+        try:
+            res = self.db.frases.insert_many(frases, ordered=False)
+            return len(res.inserted_ids), 0
+        except BulkWriteError as e:
+            errores = e.details.get("writeErrors", [])
+            duplicadas = sum(1 for err in errores if err.get("code") == 11000)
+            if duplicadas < len(errores):
+                raise
+            return e.details.get("nInserted", 0), duplicadas
+
+    def obtener_frases_terror(self, limite: Optional[int] = None) -> List[dict]:
+        # solo los campos que usa el catálogo
+        cursor = self.db.frases.find({}, {"texto": 1, "dificultad": 1, "categoria": 1}, batch_size=5000)
+        if limite:
+            cursor = cursor.limit(limite)
+        return list(cursor)
+
+    def firma_frases(self):
+        # barata: cantidad estimada + último _id insertado
+        ultimo = self.db.frases.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        return self.db.frases.estimated_document_count(), ultimo["_id"] if ultimo else None
 
     # -------------------------------------------------------
     # JUGADORES
@@ -90,45 +218,223 @@ class BaseDatos:
     def actualizar_sala(self, sala: Sala):
         self.db.salas.update_one({"id": sala.id}, {"$set": sala.dict()})
 
+    def actualizar_sala_parcial(self, sala_id: str, cambios: Dict[str, Any]):
+        # solo las rutas que cambiaron (ver models.calcular_cambios)
+        if cambios:
+            self.db.salas.update_one({"id": sala_id}, {"$set": cambios})
+
     def eliminar_sala(self, sala_id: str):
         self.db.salas.delete_one({"id": sala_id})
 
     # -------------------------------------------------------
     # PARTIDAS
     # -------------------------------------------------------
-    def guardar_partida(self, partida: Partida) -> str:
+    def guardar_partida(self, partida: Partida) -> List[dict]:
+        """Guarda la partida y devuelve las filas de estadísticas ya acumuladas de sus jugadores."""
         data = partida.dict()
-        res = self.db.partidas.insert_one(data)
-        return str(res.inserted_id)
+        self.db.partidas.insert_one(data)
+        return self._acumular_estadisticas(partida)
 
-    def obtener_estadisticas_jugador(self, jugador_id: str) -> EstadisticasJugador:
-        pipeline = [
-            {"$match": {"jugadores.id": jugador_id}},
-            {"$unwind": "$jugadores"},
-            {"$match": {"jugadores.id": jugador_id}},
-            {"$group": {
-                "_id": "$jugadores.id",
-                "nombre": {"$first": "$jugadores.nombre"},
-                "partidas_jugadas": {"$sum": 1},
-                "partidas_ganadas": {"$sum": {"$cond": [{"$eq": ["$ganador", jugador_id]}, 1, 0]}},
-                "ppm_promedio": {"$avg": "$jugadores.ppm"},
-                "mejor_ppm": {"$max": "$jugadores.ppm"},
-                "total_errores": {"$sum": "$jugadores.errores"},
-            }}
-        ]
+    # -------------------------------------------------------
+    # ESTADÍSTICAS (materializadas, una fila por jugador)
+    # -------------------------------------------------------
+    def _acumular_estadisticas(self, partida: Partida) -> List[dict]:
+        # incremental: solo toca a los jugadores de esta partida; cada update
+        # devuelve la fila resultante, que es lo que usan las clasificaciones
+        dificultad = partida.frases_usadas[0].dificultad if partida.frases_usadas else None
+        filas = []
+        for j in partida.jugadores:
+            gano = partida.ganador == j.id
+            actualizacion = {
+                "$set": {"nombre": j.nombre, "ultima_partida": partida.fecha},
+                "$inc": {
+                    "partidas_jugadas": 1,
+                    "partidas_ganadas": 1 if gano else 0,
+                    "suma_ppm": j.ppm,
+                    "total_errores": j.errores,
+                },
+                "$max": {"mejor_ppm": j.ppm},
+            }
+            if dificultad:
+                actualizacion["$max"][f"mejor_ppm_dificultad.{dificultad}"] = j.ppm
+            if gano:
+                actualizacion["$inc"]["racha_victorias"] = 1
+            else:
+                actualizacion["$set"]["racha_victorias"] = 0
+            filas.append(self.db.estadisticas.find_one_and_update(
+                {"jugador_id": j.id}, actualizacion, projection=CAMPOS_CLASIFICACION,
+                upsert=True, return_document=ReturnDocument.AFTER,
+            ))
+        return filas
+
+    def reconstruir_estadisticas(self, lote: int = 1000) -> int:
+        """
+        Recalcula la colección `estadisticas` desde todas las partidas, en orden
+        de fecha (la racha depende del orden). Devuelve cuántos jugadores escribió.
+        """
+        acumulado: Dict[str, dict] = {}
+        cursor = self.db.partidas.find(
+            {}, {"_id": 0, "ganador": 1, "fecha": 1, "jugadores.id": 1, "jugadores.nombre": 1,
+                 "jugadores.ppm": 1, "jugadores.errores": 1, "frases_usadas.dificultad": 1}
+        ).sort("fecha", 1)
+
+        for partida in cursor:
+            frases = partida.get("frases_usadas") or []
+            dificultad = frases[0].get("dificultad") if frases else None
+            for j in partida.get("jugadores", []):
+                e = acumulado.setdefault(j["id"], {
+                    "jugador_id": j["id"], "partidas_jugadas": 0, "partidas_ganadas": 0, "suma_ppm": 0.0,
+                    "mejor_ppm": 0.0, "mejor_ppm_dificultad": {}, "total_errores": 0, "racha_victorias": 0,
+                })
+                ppm = j.get("ppm", 0) or 0
+                gano = partida.get("ganador") == j["id"]
+                e["nombre"] = j.get("nombre", "")
+                e["ultima_partida"] = partida.get("fecha")
+                e["partidas_jugadas"] += 1
+                e["partidas_ganadas"] += 1 if gano else 0
+                e["suma_ppm"] += ppm
+                e["mejor_ppm"] = max(e["mejor_ppm"], ppm)
+                if dificultad:
+                    e["mejor_ppm_dificultad"][dificultad] = max(e["mejor_ppm_dificultad"].get(dificultad, 0), ppm)
+                e["total_errores"] += j.get("errores", 0) or 0
+                e["racha_victorias"] = e["racha_victorias"] + 1 if gano else 0
+
+        operaciones = [ReplaceOne({"jugador_id": jid}, e, upsert=True) for jid, e in acumulado.items()]
+        for i in range(0, len(operaciones), lote):
+            self.db.estadisticas.bulk_write(operaciones[i:i + lote], ordered=False)
+        return len(operaciones)
 
-        r = list(self.db.partidas.aggregate(pipeline))
-        if r:
-            data = r[0]
+    def obtener_filas_estadisticas(self, desde: Optional[datetime] = None) -> List[dict]:
+        # solo lo que usan las clasificaciones; con `desde`, solo las filas que cambiaron
+        filtro = {"ultima_partida": {"$gte": desde}} if desde else {}
+        return list(self.db.estadisticas.find(filtro, CAMPOS_CLASIFICACION))
+
+    def obtener_estadisticas_jugador(self, jugador_id: str) -> EstadisticasJugador:
+        data = self.db.estadisticas.find_one({"jugador_id": jugador_id}, {"_id": 0})
+        if data:
+            jugadas = data.get("partidas_jugadas", 0)
             return EstadisticasJugador(
-                jugador_id=data["_id"],
-                nombre=data["nombre"],
-                partidas_jugadas=data["partidas_jugadas"],
-                partidas_ganadas=data["partidas_ganadas"],
-                ppm_promedio=round(data["ppm_promedio"], 2),
-                mejor_ppm=round(data["mejor_ppm"], 2),
-                total_errores=data["total_errores"]
+                jugador_id=jugador_id,
+                nombre=data.get("nombre", ""),
+                partidas_jugadas=jugadas,
+                partidas_ganadas=data.get("partidas_ganadas", 0),
+                ppm_promedio=round(data.get("suma_ppm", 0) / jugadas, 2) if jugadas else 0.0,
+                mejor_ppm=round(data.get("mejor_ppm", 0), 2),
+                total_errores=data.get("total_errores", 0),
+                racha_victorias=data.get("racha_victorias", 0)
             )
 
         return EstadisticasJugador(jugador_id=jugador_id, nombre="")
 
+
+class BaseDatosAsync:
+    """
+    Misma interfaz que BaseDatos, pero cada llamada corre en un pool de hilos
+    dedicado y se espera con await, así el event loop nunca se bloquea
+    mientras pymongo hace el round-trip.
+    """
+
+    def __init__(self, base_datos: Optional[BaseDatos] = None, hilos: int = MONGO_HILOS):
+        self.sincrona = base_datos or BaseDatos(preparar=False)
+        self.hilos = hilos
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="mongo")
+        # tope (s) para cada operación mientras valga, incluida la selección de
+        # servidor: el arranque no espera los 30 s del driver si MongoDB no está
+        self.limite_operacion: Optional[float] = None
+        # perfiles por id: reconexiones y uniones repiten la misma lectura
+        self.cache_jugadores = CacheLRU(JUGADORES_CACHE_MAX, JUGADORES_CACHE_TTL)
+
+    @staticmethod
+    def _con_limite(limite: float, llamada):
+        with pymongo.timeout(limite):
+            return llamada()
+
+    async def _ejecutar(self, funcion, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        llamada = partial(funcion, *args, **kwargs)
+        if self.limite_operacion:
+            llamada = partial(self._con_limite, self.limite_operacion, llamada)
+        return await loop.run_in_executor(self._executor, llamada)
+
+    async def cerrar(self):
+        # sin esperar en el loop: lo encolado se descarta y lo que esté corriendo
+        # (p.ej. un preparar() colgado de un MongoDB caído) termina solo
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        await asyncio.get_running_loop().run_in_executor(None, self.sincrona.cerrar)
+
+    async def preparar(self):
+        return await self._ejecutar(self.sincrona.preparar)
+
+    def metricas(self) -> dict:
+        return {
+            "hilos": self.hilos,
+            "opciones": opciones_cliente(),
+            **self.sincrona.monitor.metricas(),
+        }
+
+    # -------------------------------------------------------
+    # FRASES DE TERROR
+    # -------------------------------------------------------
+    async def inicializar_frases_terror(self):
+        return await self._ejecutar(self.sincrona.inicializar_frases_terror)
+
+    async def obtener_frases_terror(self, limite: Optional[int] = None) -> List[dict]:
+        return await self._ejecutar(self.sincrona.obtener_frases_terror, limite)
+
+    async def firma_frases(self):
+        return await self._ejecutar(self.sincrona.firma_frases)
+
+    # -------------------------------------------------------
+    # JUGADORES
+    # -------------------------------------------------------
+    async def guardar_jugador(self, jugador: Jugador):
+        try:
+            return await self._ejecutar(self.sincrona.guardar_jugador, jugador)
+        finally:
+            self.cache_jugadores.invalidar(jugador.id)
+
+    async def obtener_jugador(self, jugador_id: str) -> Optional[Jugador]:
+        jugador = await self.cache_jugadores.obtener(
+            jugador_id, lambda: self._ejecutar(self.sincrona.obtener_jugador, jugador_id)
+        )
+        # copia: el que llama lo mete en una sala y lo modifica
+        return jugador.copy(deep=True) if jugador else None
+
+    async def obtener_jugador_por_nombre(self, nombre: str):
+        return await self._ejecutar(self.sincrona.obtener_jugador_por_nombre, nombre)
+
+    # -------------------------------------------------------
+    # SALAS
+    # -------------------------------------------------------
+    async def crear_sala(self, sala: Sala) -> str:
+        return await self._ejecutar(self.sincrona.crear_sala, sala)
+
+    async def obtener_sala(self, sala_id: str) -> Optional[Sala]:
+        return await self._ejecutar(self.sincrona.obtener_sala, sala_id)
+
+    async def obtener_sala_por_codigo(self, codigo: str) -> Optional[Sala]:
+        return await self._ejecutar(self.sincrona.obtener_sala_por_codigo, codigo)
+
+    async def actualizar_sala(self, sala: Sala):
+        return await self._ejecutar(self.sincrona.actualizar_sala, sala)
+
+    async def actualizar_sala_parcial(self, sala_id: str, cambios: Dict[str, Any]):
+        return await self._ejecutar(self.sincrona.actualizar_sala_parcial, sala_id, cambios)
+
+    async def eliminar_sala(self, sala_id: str):
+        return await self._ejecutar(self.sincrona.eliminar_sala, sala_id)
+
+    # -------------------------------------------------------
+    # PARTIDAS
+    # -------------------------------------------------------
+    async def guardar_partida(self, partida: Partida) -> List[dict]:
+        return await self._ejecutar(self.sincrona.guardar_partida, partida)
+
+    async def reconstruir_estadisticas(self) -> int:
+        return await self._ejecutar(self.sincrona.reconstruir_estadisticas)
+
+    async def obtener_filas_estadisticas(self, desde: Optional[datetime] = None) -> List[dict]:
+        return await self._ejecutar(self.sincrona.obtener_filas_estadisticas, desde)
+
+    async def obtener_estadisticas_jugador(self, jugador_id: str) -> EstadisticasJugador:
+        return await self._ejecutar(self.sincrona.obtener_estadisticas_jugador, jugador_id)
@@ -0,0 +1,140 @@
+# backend/despachador.py
+"""
+Despachador con afinidad de salas.
+
+Levanta N workers de uvicorn (cada uno en su socket Unix) y un proxy TCP
+delante. Por cada conexión lee la primera línea de la petición, saca el
+sala_id o el código de sala (ver afinidad.clave_de_ruta) y la manda al worker
+dueño según el anillo de hashing consistente. Así toda la lógica de una sala
+queda en memoria de un solo proceso, sin locks ni estado compartido.
+
+Uso:
+    python despachador.py --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from afinidad import AnilloConsistente, clave_de_ruta, nombres_workers
+
+MAX_CABECERA = 64 * 1024
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def _forzar_cierre(cabecera: bytes) -> bytes:
+    """
+    Sin keep-alive hacia el worker: la siguiente petición del cliente puede ser
+    de otra sala y tiene que volver a pasar por el anillo. Los upgrades a
+    WebSocket se dejan tal cual.
+    """
+    lineas = cabecera.rstrip(b"\r\n").split(b"\r\n")
+    for linea in lineas[1:]:
+        nombre, _, valor = linea.partition(b":")
+        if nombre.strip().lower() == b"connection" and b"upgrade" in valor.lower():
+            return cabecera
+
+    lineas = [lineas[0]] + [l for l in lineas[1:] if l.partition(b":")[0].strip().lower() != b"connection"]
+    return b"\r\n".join(lineas + [b"Connection: close"]) + b"\r\n\r\n"
+
+
+async def _bombear(origen: asyncio.StreamReader, destino: asyncio.StreamWriter):
+    try:
+        while True:
+            datos = await origen.read(65536)
+            if not datos:
+                break
+            destino.write(datos)
+            await destino.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            destino.close()
+        except Exception:
+            pass
+
+
+class Despachador:
+    def __init__(self, sockets: Dict[str, str]):
+        self.sockets = sockets
+        self.anillo = AnilloConsistente(list(sockets))
+        # peticiones sin sala (auth, estadísticas): por turnos
+        self._turno = itertools.cycle(list(sockets))
+
+    def elegir(self, objetivo: str) -> str:
+        clave = clave_de_ruta(objetivo)
+        return self.anillo.propietario(clave) if clave else next(self._turno)
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            cabecera = await reader.readuntil(b"\r\n\r\n")
+            _, objetivo, _ = cabecera.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            writer.close()
+            return
+
+        worker = self.elegir(objetivo)
+        try:
+            worker_reader, worker_writer = await asyncio.open_unix_connection(self.sockets[worker])
+        except OSError as e:
+            logging.error(f"Worker {worker} no disponible: {e}")
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+
+        worker_writer.write(_forzar_cierre(cabecera))
+        await asyncio.gather(_bombear(reader, worker_writer), _bombear(worker_reader, writer))
+
+
+def _lanzar_workers(total: int, directorio: str, app: str) -> Tuple[Dict[str, str], List[subprocess.Popen]]:
+    os.makedirs(directorio, exist_ok=True)
+    sockets, procesos = {}, []
+    for nombre in nombres_workers(total):
+        ruta = os.path.join(directorio, f"{nombre}.sock")
+        if os.path.exists(ruta):
+            os.unlink(ruta)
+        entorno = dict(os.environ, AFINIDAD_WORKER_ID=nombre, AFINIDAD_WORKERS=str(total))
+        procesos.append(subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--uds", ruta], env=entorno))
+        sockets[nombre] = ruta
+    return sockets, procesos
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Despachador con afinidad de salas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--dir", default="/tmp/final_sentence_workers")
+    parser.add_argument("--app", default="main:app")
+    args = parser.parse_args()
+
+    sockets, procesos = _lanzar_workers(args.workers, args.dir, args.app)
+
+    despachador = Despachador(sockets)
+    servidor = await asyncio.start_server(despachador.atender, args.host, args.port, limit=MAX_CABECERA)
+    logging.info(f"Despachador en {args.host}:{args.port} -> {args.workers} workers")
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, parar.set)
+
+    async with servidor:
+        await parar.wait()
+
+    for p in procesos:
+        p.terminate()
+    for p in procesos:
+        p.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+# backend/escritura.py
+import time
+from typing import Dict, Optional
+
+from config import ESCRITURA_TOLERAR_ACENTOS
+from frases import FraseCompilada, plegar_caracter
+
+
+class ResultadoDelta:
+    __slots__ = ("aceptados", "error", "completo")
+
+    def __init__(self, aceptados: int = 0, error: bool = False, completo: bool = False):
+        self.aceptados = aceptados
+        self.error = error
+        self.completo = completo
+
+
+class ProgresoEscritura:
+    """Cursor validado de un jugador en la ronda actual."""
+
+    __slots__ = ("cursor", "inicio")
+
+    def __init__(self, inicio: Optional[float] = None):
+        self.cursor = 0
+        self.inicio = inicio if inicio is not None else time.monotonic()
+
+    def aplicar(self, frase: FraseCompilada, agregado: str, cursor: int,
+                tolerar_acentos: bool = ESCRITURA_TOLERAR_ACENTOS) -> ResultadoDelta:
+        """
+        `agregado` son los caracteres nuevos que el cliente escribió a partir
+        de la posición `cursor`. Lo ya validado (reenvíos) se salta; un hueco
+        (cursor por delante del servidor) no avanza nada. El primer carácter
+        incorrecto corta el delta y cuenta como error.
+        """
+        if cursor > self.cursor:
+            return ResultadoDelta()
+
+        inicio = self.cursor - cursor
+        aceptados = 0
+        texto = frase.texto
+        plegado = frase.texto_plegado
+        for j in range(inicio, len(agregado)):
+            c = agregado[j]
+            if self.cursor >= frase.largo:
+                return ResultadoDelta(aceptados, error=True)
+            if texto[self.cursor] != c and not (tolerar_acentos and plegado[self.cursor] == plegar_caracter(c)):
+                return ResultadoDelta(aceptados, error=True)
+            self.cursor += 1
+            aceptados += 1
+
+        return ResultadoDelta(aceptados, completo=self.cursor >= frase.largo)
+
+    def progreso(self, frase: FraseCompilada) -> float:
+        if frase.largo == 0:
+            return 100.0
+        return round(self.cursor * 100 / frase.largo, 2)
+
+    def ppm(self, frase: FraseCompilada, ahora: Optional[float] = None) -> int:
+        transcurrido = (ahora if ahora is not None else time.monotonic()) - self.inicio
+        if transcurrido <= 0:
+            return 0
+        return int(frase.palabras_hasta[self.cursor] / transcurrido * 60)
+
+
+class RondaEscritura:
+    """Frase compilada de la ronda en curso y el progreso de cada jugador."""
+
+    def __init__(self, frase: FraseCompilada, transcurrido: float = 0.0):
+        self.frase = frase
+        self.inicio = time.monotonic() - transcurrido
+        self.progresos: Dict[str, ProgresoEscritura] = {}
+
+    def progreso_de(self, jugador_id: str, porcentaje_inicial: float = 0.0) -> ProgresoEscritura:
+        progreso = self.progresos.get(jugador_id)
+        if progreso is None:
+            progreso = self.progresos[jugador_id] = ProgresoEscritura(self.inicio)
+            # ronda retomada en otro worker: se parte del progreso ya publicado
+            progreso.cursor = min(self.frase.largo, int(round(porcentaje_inicial * self.frase.largo / 100)))
+        return progreso
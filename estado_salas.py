@@ -0,0 +1,207 @@
+# backend/estado_salas.py
+import abc
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import zlib
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from config import ALMACEN_SALAS, ALMACEN_SALAS_DIR
+from models import Sala
+
+
+class AlmacenSalas(abc.ABC):
+    """
+    Dónde vive el estado de las salas activas. Se usa como un dict
+    (get / in / [] / del) y además guardar(sala) publica los cambios
+    para que otros procesos los vean.
+    """
+
+    # avisa cuando otro proceso eliminó una sala que este tenía cargada
+    al_desaparecer: Optional[Callable[[Sala], None]] = None
+
+    @contextlib.asynccontextmanager
+    async def bloqueo(self, sala_id: str):
+        """Exclusión entre procesos para leer, modificar y guardar una sala. En un solo proceso no hace falta."""
+        yield
+
+    @abc.abstractmethod
+    def get(self, sala_id: str, defecto: Optional[Sala] = None) -> Optional[Sala]:
+        ...
+
+    @abc.abstractmethod
+    def guardar(self, sala: Sala):
+        ...
+
+    @abc.abstractmethod
+    def eliminar(self, sala_id: str):
+        ...
+
+    @abc.abstractmethod
+    def ids(self) -> Iterator[str]:
+        ...
+
+    def __contains__(self, sala_id: str) -> bool:
+        return self.get(sala_id) is not None
+
+    def __getitem__(self, sala_id: str) -> Sala:
+        sala = self.get(sala_id)
+        if sala is None:
+            raise KeyError(sala_id)
+        return sala
+
+    def __setitem__(self, sala_id: str, sala: Sala):
+        self.guardar(sala)
+
+    def __delitem__(self, sala_id: str):
+        self.eliminar(sala_id)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.ids())
+
+
+class AlmacenSalasMemoria(AlmacenSalas):
+    """Un dict del proceso. Sirve con un solo worker."""
+
+    def __init__(self):
+        self._salas: Dict[str, Sala] = {}
+
+    def get(self, sala_id: str, defecto: Optional[Sala] = None) -> Optional[Sala]:
+        return self._salas.get(sala_id, defecto)
+
+    def guardar(self, sala: Sala):
+        self._salas[sala.id] = sala
+
+    def eliminar(self, sala_id: str):
+        self._salas.pop(sala_id, None)
+
+    def ids(self) -> Iterator[str]:
+        return iter(list(self._salas))
+
+    def __len__(self) -> int:
+        return len(self._salas)
+
+
+class AlmacenSalasArchivo(AlmacenSalas):
+    """
+    Estado compartido entre workers de uvicorn: un JSON por sala en un
+    directorio (idealmente en /dev/shm). Las escrituras son atómicas
+    (archivo temporal + rename) y cada proceso cachea la sala mientras el
+    archivo no cambie, así una lectura sin cambios cuesta un stat().
+    Cada evento de una sala corre bajo bloqueo(sala_id), un flock compartido
+    por todos los workers: leer, modificar y guardar no se intercala con
+    los eventos que atiende otro worker.
+    """
+
+    # archivos de bloqueo fijos (nunca se borran: borrar uno en uso rompería la exclusión)
+    FRANJAS_BLOQUEO = 64
+
+    def __init__(self, directorio: str = ALMACEN_SALAS_DIR):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._cache: Dict[str, Tuple[Tuple[int, int], Sala]] = {}
+        self._bloqueadas: Set[str] = set()
+
+    def _ruta_bloqueo(self, sala_id: str) -> str:
+        franja = zlib.crc32(sala_id.encode()) % self.FRANJAS_BLOQUEO
+        return os.path.join(self.directorio, f".bloqueo_{franja}.lock")
+
+    @contextlib.asynccontextmanager
+    async def bloqueo(self, sala_id: str):
+        if sala_id in self._bloqueadas:
+            # evento anidado de la misma sala (mismo actor): el bloqueo ya es suyo
+            yield
+            return
+
+        fd = os.open(self._ruta_bloqueo(sala_id), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # sin bloquear el loop: se reintenta con espera creciente
+            espera = 0.001
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, 0.02)
+
+            self._bloqueadas.add(sala_id)
+            try:
+                yield
+            finally:
+                self._bloqueadas.discard(sala_id)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _ruta(self, sala_id: str) -> str:
+        return os.path.join(self.directorio, f"{sala_id}.json")
+
+    @staticmethod
+    def _version(st: os.stat_result) -> Tuple[int, int]:
+        # cada rename deja un inodo nuevo: cambia aunque el mtime coincida
+        return st.st_ino, st.st_mtime_ns
+
+    def get(self, sala_id: str, defecto: Optional[Sala] = None) -> Optional[Sala]:
+        ruta = self._ruta(sala_id)
+        try:
+            version = self._version(os.stat(ruta))
+        except FileNotFoundError:
+            cacheada = self._cache.pop(sala_id, None)
+            if cacheada and self.al_desaparecer:
+                # la eliminó otro worker: que este suelte lo que tenía de ella
+                self.al_desaparecer(cacheada[1])
+            return defecto
+
+        cacheada = self._cache.get(sala_id)
+        if cacheada and cacheada[0] == version:
+            return cacheada[1]
+
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                sala = Sala(**json.load(f))
+        except (FileNotFoundError, ValueError) as e:
+            logging.warning(f"No se pudo leer sala compartida {sala_id}: {e}")
+            return defecto
+
+        self._cache[sala_id] = (version, sala)
+        return sala
+
+    def guardar(self, sala: Sala):
+        datos = json.dumps(sala.dict(), default=str)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(datos)
+            os.replace(temporal, self._ruta(sala.id))
+        except Exception:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+
+        self._cache[sala.id] = (self._version(os.stat(self._ruta(sala.id))), sala)
+
+    def eliminar(self, sala_id: str):
+        self._cache.pop(sala_id, None)
+        try:
+            os.unlink(self._ruta(sala_id))
+        except FileNotFoundError:
+            pass
+
+    def ids(self) -> Iterator[str]:
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".json") and not nombre.startswith("."):
+                yield nombre[:-5]
+
+
+def crear_almacen_salas(tipo: str = ALMACEN_SALAS) -> AlmacenSalas:
+    if tipo == "archivo":
+        logging.info(f"Estado de salas compartido en {ALMACEN_SALAS_DIR}")
+        return AlmacenSalasArchivo()
+    return AlmacenSalasMemoria()
@@ -0,0 +1,173 @@
+# backend/frases.py
+import random
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Frase
+
+# Clases de carácter (una por posición, en FraseCompilada.clases)
+CLASE_LETRA = 0
+CLASE_ESPACIO = 1
+CLASE_PUNTUACION = 2
+CLASE_DIGITO = 3
+
+
+def normalizar_texto(texto: str) -> str:
+    # NFC para que "é" sea un solo carácter, y espacios colapsados
+    return " ".join(unicodedata.normalize("NFC", texto).split())
+
+
+def clave_frase(texto: str) -> str:
+    # para detectar duplicados: mismo texto salvo espacios y mayúsculas
+    return normalizar_texto(texto).casefold()
+
+
+def plegar_acentos(texto: str) -> str:
+    # "acción" -> "accion"; la ñ se pliega a n
+    descompuesto = unicodedata.normalize("NFD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _clase(c: str) -> int:
+    if c.isspace():
+        return CLASE_ESPACIO
+    if c.isdigit():
+        return CLASE_DIGITO
+    if c.isalpha():
+        return CLASE_LETRA
+    return CLASE_PUNTUACION
+
+
+# tabla carácter -> carácter plegado, para comparar sin armar strings nuevos
+PLEGADO: Dict[str, str] = {}
+
+
+def plegar_caracter(c: str) -> str:
+    plegado = PLEGADO.get(c)
+    if plegado is None:
+        plegado = plegar_acentos(c) or c
+        PLEGADO[c] = plegado
+    return plegado
+
+
+class FraseCompilada:
+    """
+    Frase preprocesada una sola vez al cargar el catálogo, para que validar
+    escritura y calcular PPM no arme strings en cada mensaje:
+      - texto normalizado y su variante sin acentos (mismo largo)
+      - clase de cada carácter
+      - límites de palabra y palabras_hasta[i] = palabras completas al llegar a i
+    """
+
+    __slots__ = ("frase_id", "texto", "texto_plegado", "largo", "clases",
+                 "limites_palabras", "num_palabras", "palabras_hasta")
+
+    def __init__(self, frase: Frase):
+        texto = normalizar_texto(frase.texto)
+        plegado = "".join(plegar_caracter(c) for c in texto)
+
+        clases = bytes(_clase(c) for c in texto)
+
+        limites = []
+        inicio = None
+        for i, clase in enumerate(clases):
+            if clase != CLASE_ESPACIO and inicio is None:
+                inicio = i
+            elif clase == CLASE_ESPACIO and inicio is not None:
+                limites.append((inicio, i))
+                inicio = None
+        if inicio is not None:
+            limites.append((inicio, len(texto)))
+
+        palabras_hasta = [0] * (len(texto) + 1)
+        completas = 0
+        fines = {fin for _, fin in limites}
+        for i in range(len(texto)):
+            # una palabra cuenta al escribir el espacio que la cierra (o el último carácter)
+            if i in fines:
+                completas += 1
+            palabras_hasta[i + 1] = completas
+        palabras_hasta[len(texto)] = len(limites)
+
+        self.frase_id = frase.id
+        self.texto = texto
+        self.texto_plegado = plegado if len(plegado) == len(texto) else texto
+        self.largo = len(texto)
+        self.clases = clases
+        self.limites_palabras: Tuple[Tuple[int, int], ...] = tuple(limites)
+        self.num_palabras = len(limites)
+        self.palabras_hasta: Tuple[int, ...] = tuple(palabras_hasta)
+
+    def __setattr__(self, nombre, valor):
+        if hasattr(self, nombre):
+            raise AttributeError("FraseCompilada es inmutable")
+        object.__setattr__(self, nombre, valor)
+
+
+def compilar_frases(frases: Iterable[Frase]) -> Dict[str, FraseCompilada]:
+    return {f.id: FraseCompilada(f) for f in frases}
+
+
+class IndiceFrases:
+    """
+    Catálogo inmutable indexado por (dificultad, categoria).
+    Se precalculan también los comodines: (d, None), (None, c) y (None, None),
+    así elegir el grupo de una ronda es un lookup y no un recorrido.
+    """
+
+    def __init__(self, frases: Iterable[Frase]):
+        self.frases: Tuple[Frase, ...] = tuple(frases)
+        self.compiladas: Dict[str, FraseCompilada] = compilar_frases(self.frases)
+
+        grupos: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        for i, f in enumerate(self.frases):
+            for clave in ((f.dificultad, f.categoria), (f.dificultad, None), (None, f.categoria), (None, None)):
+                grupos.setdefault(clave, []).append(i)
+        self._grupos = {clave: tuple(indices) for clave, indices in grupos.items()}
+
+    def __len__(self) -> int:
+        return len(self.frases)
+
+    def grupo(self, dificultad: Optional[str] = None, categoria: Optional[str] = None) -> Tuple[int, ...]:
+        return self._grupos.get((dificultad, categoria), ())
+
+    def dificultades(self) -> List[str]:
+        return sorted(d for d, c in self._grupos if d is not None and c is None)
+
+    def categorias(self) -> List[str]:
+        return sorted(c for d, c in self._grupos if d is None and c is not None)
+
+
+class MazoFrases:
+    """
+    Mazo barajado de una sala: no repite frase hasta agotar el grupo.
+    Fisher-Yates perezoso: solo se guardan las posiciones intercambiadas,
+    así cada sacada es O(1) aunque el grupo tenga decenas de miles de frases.
+    """
+
+    def __init__(self, indice: IndiceFrases, dificultad: Optional[str] = None, categoria: Optional[str] = None):
+        self.indice = indice
+        self.dificultad = dificultad
+        self.categoria = categoria
+        self._grupo = indice.grupo(dificultad, categoria)
+        self._restantes = len(self._grupo)
+        self._intercambios: Dict[int, int] = {}
+
+    def sacar(self) -> Optional[Frase]:
+        if not self._grupo:
+            return None
+
+        if self._restantes == 0:
+            # mazo agotado: se vuelve a barajar
+            self._restantes = len(self._grupo)
+            self._intercambios.clear()
+
+        ultimo = self._restantes - 1
+        j = random.randint(0, ultimo)
+        elegido = self._intercambios.get(j, j)
+        self._intercambios[j] = self._intercambios.pop(ultimo, ultimo)
+        if j == ultimo:
+            self._intercambios.pop(j, None)
+        self._restantes = ultimo
+
+        return self.indice.frases[self._grupo[elegido]]
@@ -1,5 +1,14 @@
 #Backend/game_controller.py
+from fastapi.requests import HTTPConnection
+
 from game_manager import AdministradorJuego
 
-# Instancia única del juego compartida por HTTP y WebSocket
-juego = AdministradorJuego()
+
+def crear_juego() -> AdministradorJuego:
+    # uno por app: lo arma el ciclo de vida de main y queda en app.state.juego
+    return AdministradorJuego()
+
+
+def obtener_juego(conexion: HTTPConnection) -> AdministradorJuego:
+    # el juego de la app que atiende esta conexión (HTTP o WebSocket)
+    return conexion.app.state.juego
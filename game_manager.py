@@ -1,153 +1,314 @@
 # backend/game_manager.py
 import asyncio
+import hashlib
+import json
 import random
+import time
 import string
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import logging
-import time
 
 from fastapi import WebSocket
+from pymongo.errors import DuplicateKeyError
 
 # Placeholders para tus modelos y base de datos
 from models import Sala, Jugador, Frase, EstadoJugador, TipoSala, Partida
-from database import BaseDatos
+from database import BaseDatosAsync
+from persistencia import BufferEscritura
+from catalogo import CatalogoFrases
+from clasificacion import Clasificaciones
+from cache import CacheLRU
+from metricas import HistogramaLatencia
+from estado_salas import AlmacenSalas, crear_almacen_salas
+from transmision import TransmisorSalas, ConexionSala
+from bus_salas import crear_bus
+from afinidad import AfinidadLocal
+from temporizador import RuedaTemporizadores, Temporizador
+from actor_sala import SistemaActores
+from jugadores_sala import IndiceJugadores
+from escritura import RondaEscritura
+from frases import FraseCompilada, IndiceFrases, MazoFrases, normalizar_texto, plegar_acentos
+from config import (
+    ARRANQUE_LIMITE_MONGO, ESCRITURA_TOLERAR_ACENTOS, ESTADISTICAS_CACHE_MAX, ESTADISTICAS_CACHE_TTL,
+)
+
+# aviso por el bus entre workers, no va a ningún socket
+CLASE_INVALIDAR_ESTADISTICAS = "invalidar_estadisticas"
 
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
 
 
 class AdministradorJuego:
     def __init__(self):
-        self.base_datos = BaseDatos()
-        self.salas_activas: Dict[str, Sala] = {}
-        self.conexiones: Dict[str, List[WebSocket]] = {}
+        self.base_datos = BaseDatosAsync()
+        self.persistencia = BufferEscritura(self.base_datos)
+        # estado de salas: en memoria o compartido entre workers (ALMACEN_SALAS)
+        self.salas_activas: AlmacenSalas = crear_almacen_salas()
+        self.salas_activas.al_desaparecer = self._sala_desaparecida
+        self.conexiones: Dict[str, List[ConexionSala]] = {}
+        # código de sala -> sala_id de las salas que este proceso tiene cargadas
+        self._codigos: Dict[str, str] = {}
+        self.bus = crear_bus()
+        # con despachador.py cada sala vive en un solo worker (hashing consistente)
+        self.afinidad = AfinidadLocal()
+        self.transmisor = TransmisorSalas(self.conexiones, bus=self.bus)
+
+        # Catálogo de frases (MongoDB o fallback), indexado y recargable en caliente
+        self.catalogo = CatalogoFrases(self.base_datos)
+
+        # Tablas de posiciones en memoria, al día con cada partida terminada
+        self.clasificaciones = Clasificaciones(self.base_datos)
+
+        # Estadísticas por jugador ya serializadas, con su ETag
+        self.cache_estadisticas = CacheLRU(ESTADISTICAS_CACHE_MAX, ESTADISTICAS_CACHE_TTL)
+        self._recalculo_estadisticas = HistogramaLatencia()
+        # /jugador/{id}/estadisticas se reparte entre workers: todos invalidan
+        self.bus.suscribir(CLASE_INVALIDAR_ESTADISTICAS, self._invalidar_estadisticas)
+
+        # Mazo barajado por sala (sin repetir frase hasta agotar el grupo)
+        self._mazos: Dict[str, MazoFrases] = {}
+
+        # Todos los plazos del juego (ronda, reconexión, limpieza) en una sola rueda
+        self.temporizadores = RuedaTemporizadores()
+        self._monitores_tiempo: Dict[str, Temporizador] = {}
+        self._reconexiones: Dict[Tuple[str, str], Temporizador] = {}
+
+        # Frase compilada y cursores de la ronda en curso, por sala
+        self._rondas: Dict[str, RondaEscritura] = {}
+
+        # id -> jugador y contadores vivos/completados/eliminados, por sala
+        self._jugadores: Dict[str, IndiceJugadores] = {}
+
+        # Un actor por sala: sus eventos se procesan en orden, de a uno
+        self.actores = SistemaActores()
+
+        # pasos del arranque que ya salieron bien (calentar solo reintenta el resto)
+        self._calentados: Set[str] = set()
 
-        # Cargar frases desde MongoDB (o fallback)
-        self.frases_terror = self._cargar_frases_terror()
+    # ======================================================
+    # ===============   ARRANQUE   =========================
+    # ======================================================
+    async def calentar(self) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """
+        Todo lo que necesita MongoDB para arrancar, fuera del import y en paralelo:
+        índices + semillas y luego el catálogo, junto con las clasificaciones.
+        Se puede llamar de nuevo tras un fallo: solo repite los pasos pendientes.
+        Devuelve (cuánto tardó cada paso, error de cada paso que falló); está
+        todo caliente cuando no quedan errores.
+        """
+        tiempos: Dict[str, float] = {}
+        errores: Dict[str, str] = {}
+        # con MongoDB caído cada intento falla rápido y el reintento decide
+        self.base_datos.limite_operacion = ARRANQUE_LIMITE_MONGO
+
+        async def medir(nombre: str, paso: Callable[[], Awaitable]) -> bool:
+            if nombre in self._calentados:
+                return True
+            inicio = time.perf_counter()
+            try:
+                # catálogo y clasificaciones registran su error y devuelven False
+                if await paso() is False:
+                    raise RuntimeError("no se pudo cargar desde MongoDB")
+            except Exception as e:
+                logging.error(f"Arranque: falló {nombre}: {e}")
+                errores[nombre] = str(e)
+            else:
+                self._calentados.add(nombre)
+            tiempos[nombre] = round(time.perf_counter() - inicio, 3)
+            return nombre in self._calentados
+
+        async def base_y_catalogo():
+            if await medir("base_datos", self.base_datos.preparar):
+                await medir("catalogo", self.catalogo.cargar)
+            else:
+                errores["catalogo"] = "pendiente de base_datos"
 
-        # Monitores de tiempo por sala
-        self._monitores_tiempo: Dict[str, asyncio.Task] = {}
+        try:
+            await asyncio.gather(base_y_catalogo(), medir("clasificaciones", self.clasificaciones.recargar))
+        finally:
+            self.base_datos.limite_operacion = None
+        return tiempos, errores
 
     # ======================================================
-    # ===============   CARGA DE FRASES   ==================
+    # ===============   ACTORES   ==========================
     # ======================================================
-    def _cargar_frases_terror(self) -> List[Frase]:
+    async def en_sala(self, sala_id: str, funcion: Callable[..., Awaitable], *args, crear: Optional[bool] = None):
         """
-        Carga frases desde MongoDB.
-        Si la base está vacía o falla -> usa frases hardcodeadas.
+        Ejecuta `funcion(*args)` en el actor de la sala y devuelve su resultado.
+        Solo se crea actor para salas activas (o si el llamador ya sabe que
+        existe, crear=True); para una sala inexistente o ya eliminada devuelve None.
         """
-        try:
-            start = time.time()
-            frases_db = self.base_datos.obtener_frases_terror(200)
-            logging.debug(f"Cargando frases desde MongoDB... ({len(frases_db)} encontradas)")
-            logging.debug(f"Tiempo carga frases: {time.time() - start:.3f}s")
-        except Exception as e:
-            logging.error(f"No se pudo cargar frases desde DB: {e}")
-            frases_db = []
-
-        frases = []
-
-        if frases_db:
-            for i, frase in enumerate(frases_db):
-                mongo_id = frase.get("_id")
-                frases.append(Frase(
-                    id=str(mongo_id) if mongo_id else str(i),
-                    texto=frase.get("texto") or "",
-                    dificultad=frase.get("dificultad") or "media",
-                    categoria=frase.get("categoria") or "terror"
-                ))
-            logging.info(f"✔ {len(frases)} frases cargadas desde MongoDB")
-            return frases
-
-        # fallback hardcodeado
-        frases_hardcode = [
-            "La sombra avanzaba silenciosa por el pasillo.",
-            "Al abrir la puerta, nadie respondió al llamado.",
-            "El susurro decía mi nombre al oído sin moverse nadie.",
-            "Las luces titilaron y la figura estaba ya detrás de mí.",
-            "No había teléfonos en la casa, pero alguien marcó desde adentro.",
-            "Encontré una nota en mi almohada que decía: vuelve a dormir.",
-            "El espejo reflejó una habitación que no era la mía.",
-            "Cada vez que parpadeaba, alguien estaba más cerca.",
-            "La casa respiraba y yo no estaba dentro de ella.",
-            "Las marcas en la pared formaban mi nombre al revés."
-        ]
-
-        frases = [
-            Frase(id=str(i), texto=txt, dificultad="media", categoria="terror")
-            for i, txt in enumerate(frases_hardcode)
-        ]
-
-        logging.warning("⚠ MongoDB no respondió, usando frases HARDCODEADAS")
-        return frases
+        if crear is None:
+            crear = sala_id in self.salas_activas
+        return await self.actores.ejecutar(sala_id, self._con_bloqueo, sala_id, funcion, *args, crear=crear)
+
+    def _enviar_a_sala(self, sala_id: str, funcion: Callable[..., Awaitable], *args):
+        self.actores.enviar(sala_id, self._con_bloqueo, sala_id, funcion, *args,
+                            crear=sala_id in self.salas_activas)
+
+    async def _con_bloqueo(self, sala_id: str, funcion: Callable[..., Awaitable], *args):
+        # el actor ordena los eventos de este proceso; el bloqueo del almacén,
+        # los de todos los workers que comparten la sala
+        async with self.salas_activas.bloqueo(sala_id):
+            return await funcion(*args)
+
+    def _programar_en_sala(self, segundos: float, sala_id: str, funcion: Callable[..., Awaitable], *args,
+                           tipo: str) -> Temporizador:
+        # el temporizador solo deja el evento en el buzón de la sala (si sigue existiendo)
+        return self.temporizadores.programar(segundos, self._enviar_a_sala, sala_id, funcion, *args, tipo=tipo)
+
+    # ======================================================
+    # ===============   FRASES   ===========================
+    # ======================================================
+    @property
+    def indice_frases(self) -> IndiceFrases:
+        # siempre el índice vigente: el catálogo lo reemplaza al recargar
+        return self.catalogo.indice
+
+    def _frase_compilada(self, frase: Frase) -> FraseCompilada:
+        compilada = self.indice_frases.compiladas.get(frase.id)
+        if compilada is None or compilada.texto != frase.texto:
+            # frase que no está en el catálogo actual (p.ej. recargado a mitad de ronda)
+            compilada = FraseCompilada(frase)
+        return compilada
+
+    def _siguiente_frase(self, sala: Sala) -> Frase:
+        mazo = self._mazos.get(sala.id)
+        if mazo is None or mazo.indice is not self.indice_frases:
+            mazo = MazoFrases(self.indice_frases, sala.dificultad, sala.categoria)
+            if not mazo.indice.grupo(sala.dificultad, sala.categoria):
+                logging.warning(f"Sin frases para dificultad={sala.dificultad} categoria={sala.categoria}, usando todas")
+                mazo = MazoFrases(self.indice_frases)
+            self._mazos[sala.id] = mazo
+        return mazo.sacar()
 
     # ======================================================
     # ===============   SALAS / CREACIÓN   =================
     # ======================================================
+    MAX_INTENTOS_CODIGO = 10
+
     def _generar_codigo_sala(self) -> str:
+        # sin consultar la BD: la unicidad la garantiza el índice único de `codigo`
         while True:
             codigo = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            if not self.base_datos.obtener_sala_por_codigo(codigo):
+            # detrás del despachador el código también tiene que caer en este worker
+            if self.afinidad.es_propia(codigo) and codigo not in self._codigos:
                 return codigo
 
+    def _generar_id_sala(self) -> str:
+        base = f"sala_{int(datetime.now().timestamp() * 1000)}"
+        if not self.afinidad.activa:
+            return base
+        n = 0
+        while not self.afinidad.es_propia(f"{base}_{n}"):
+            n += 1
+        return f"{base}_{n}"
+
     def obtener_sala(self, sala_id: str) -> Optional[Sala]:
         return self.salas_activas.get(sala_id)
 
-    def cargar_sala_desde_bd(self, sala_id: str) -> Optional[Sala]:
-        sala_bd = self.base_datos.obtener_sala(sala_id)
+    def _activar_sala(self, sala: Sala):
+        # sala leída de MongoDB que pasa a vivir en memoria
+        self.salas_activas[sala.id] = sala
+        self.conexiones.setdefault(sala.id, [])
+        self._codigos[sala.codigo] = sala.id
+        self.persistencia.registrar_persistida(sala)
+
+    def jugadores_de(self, sala: Sala) -> IndiceJugadores:
+        indice = self._jugadores.get(sala.id)
+        if indice is None or not indice.sincronizado(sala):
+            indice = self._jugadores[sala.id] = IndiceJugadores(sala)
+        return indice
+
+    def buscar_jugador(self, sala: Sala, jugador_id: str) -> Optional[Jugador]:
+        return self.jugadores_de(sala).obtener(jugador_id)
+
+    def sala_por_codigo(self, codigo: str) -> Optional[Sala]:
+        sala_id = self._codigos.get(codigo)
+        return self.salas_activas.get(sala_id) if sala_id else None
+
+    def sala_modificada(self, sala: Sala):
+        # publica el cambio a los demás workers y lo agenda para MongoDB
+        self.salas_activas.guardar(sala)
+        self.persistencia.marcar(sala)
+
+    async def cargar_sala_desde_bd(self, sala_id: str) -> Optional[Sala]:
+        sala_bd = await self.base_datos.obtener_sala(sala_id)
         if sala_bd:
-            self.salas_activas[sala_id] = sala_bd
-            self.conexiones.setdefault(sala_id, [])
+            # otra conexión pudo activarla mientras se leía: no pisar la que ya vive
+            if sala_id in self.salas_activas:
+                return self.salas_activas[sala_id]
+            self._activar_sala(sala_bd)
             logging.debug(f"Sala cargada desde DB: {sala_id}")
             return sala_bd
         return None
 
-    def crear_sala(self, jugador_anfitrion: Jugador, tipo: TipoSala, max_jugadores: int = 10) -> Sala:
-        sala_id = f"sala_{int(datetime.now().timestamp() * 1000)}"
-        codigo = self._generar_codigo_sala()
+    async def crear_sala(self, jugador_anfitrion: Jugador, tipo: TipoSala, max_jugadores: int = 10,
+                         dificultad: Optional[str] = None, categoria: Optional[str] = None) -> Sala:
+        sala_id = self._generar_id_sala()
 
         sala = Sala(
             id=sala_id,
-            codigo=codigo,
+            codigo=self._generar_codigo_sala(),
             tipo=tipo,
             jugadores=[jugador_anfitrion],
             jugador_anfitrion=jugador_anfitrion.id,
             max_jugadores=max_jugadores,
             estado="esperando",
             ronda_actual=0,
-            tiempo_limite=getattr(jugador_anfitrion, "tiempo_limite", 45)
+            tiempo_limite=getattr(jugador_anfitrion, "tiempo_limite", 45),
+            dificultad=dificultad,
+            categoria=categoria
         )
 
+        # se inserta directo y, si el código ya existía, se reintenta con otro
+        for _ in range(self.MAX_INTENTOS_CODIGO):
+            try:
+                await self.base_datos.crear_sala(sala)
+                self.persistencia.registrar_persistida(sala)
+                logging.debug(f"Sala creada en DB: {sala_id}")
+                break
+            except DuplicateKeyError as e:
+                if "codigo" not in (e.details or {}).get("keyPattern", {}):
+                    logging.error(f"No se pudo crear sala en DB: {e}")
+                    break
+                logging.debug(f"Código {sala.codigo} ocupado, generando otro")
+                sala.codigo = self._generar_codigo_sala()
+            except Exception as e:
+                logging.error(f"No se pudo crear sala en DB: {e}")
+                break
+
         self.salas_activas[sala_id] = sala
         self.conexiones[sala_id] = []
-
-        try:
-            self.base_datos.crear_sala(sala)
-            logging.debug(f"Sala creada en DB: {sala_id}")
-        except Exception as e:
-            logging.error(f"No se pudo crear sala en DB: {e}")
+        self._codigos[sala.codigo] = sala_id
 
         return sala
 
-    def unir_sala(self, jugador: Jugador, codigo_sala: str) -> Optional[Sala]:
-        sala = self.base_datos.obtener_sala_por_codigo(codigo_sala)
+    async def unir_sala(self, jugador: Jugador, codigo_sala: str) -> Optional[Sala]:
+        # la sala suele estar ya en memoria: solo se va a MongoDB si no
+        sala = self.sala_por_codigo(codigo_sala)
+        if not sala:
+            sala = await self.base_datos.obtener_sala_por_codigo(codigo_sala)
         if not sala:
             return None
+        return await self.en_sala(sala.id, self._unir_jugador, jugador, sala, crear=True)
 
+    async def _unir_jugador(self, jugador: Jugador, sala: Sala) -> Optional[Sala]:
         if sala.id not in self.salas_activas:
-            self.salas_activas[sala.id] = sala
-            self.conexiones.setdefault(sala.id, [])
+            self._activar_sala(sala)
 
         sala_activa = self.salas_activas[sala.id]
+        jugadores = self.jugadores_de(sala_activa)
 
-        if len(sala_activa.jugadores) >= sala_activa.max_jugadores:
+        if len(jugadores) >= sala_activa.max_jugadores:
             return None
 
-        if any(j.id == jugador.id for j in sala_activa.jugadores):
+        if jugador.id in jugadores:
             return sala_activa
 
-        sala_activa.jugadores.append(jugador)
-        self.base_datos.actualizar_sala(sala_activa)
+        jugadores.agregar(jugador)
+        self.sala_modificada(sala_activa)
 
         # Notificar WS
         asyncio.create_task(self.transmitir_a_sala(sala_activa.id, {
@@ -167,12 +328,11 @@ class AdministradorJuego:
             logging.warning(f"Intento de abandonar sala no existente: {sala_id}")
             return
 
-        jugador = next((x for x in sala.jugadores if x.id == jugador_id), None)
+        jugador = self.jugadores_de(sala).quitar(jugador_id)
         if not jugador:
             return
 
-        sala.jugadores.remove(jugador)
-        self.base_datos.actualizar_sala(sala)
+        self.sala_modificada(sala)
 
         await self.transmitir_a_sala(sala_id, {
             "tipo": "jugador_abandono",
@@ -182,11 +342,11 @@ class AdministradorJuego:
         logging.info(f"Jugador {jugador_id} abandonó sala {sala_id}")
 
         if len(sala.jugadores) == 0:
-            self.eliminar_sala(sala_id)
+            await self.eliminar_sala(sala_id)
         elif sala.jugador_anfitrion == jugador_id:
             # reasignar anfitrión
             sala.jugador_anfitrion = sala.jugadores[0].id
-            self.base_datos.actualizar_sala(sala)
+            self.sala_modificada(sala)
             await self.transmitir_a_sala(sala_id, {
                 "tipo": "nuevo_anfitrion",
                 "jugador_id": sala.jugador_anfitrion
@@ -196,28 +356,28 @@ class AdministradorJuego:
     # ======================================================
     # ================   WEBSOCKET FLOW   =================
     # ======================================================
-    def unir_sala_ws(self, jugador_id: str, sala_id: str) -> Optional[Sala]:
-        jugador = self.base_datos.obtener_jugador(jugador_id)
+    async def unir_sala_ws(self, jugador_id: str, sala_id: str) -> Optional[Sala]:
+        jugador = await self.base_datos.obtener_jugador(jugador_id)
         if not jugador:
             return None
 
         if sala_id not in self.salas_activas:
-            sala_bd = self.base_datos.obtener_sala(sala_id)
+            sala_bd = await self.base_datos.obtener_sala(sala_id)
             if not sala_bd:
                 return None
-            self.salas_activas[sala_id] = sala_bd
-            self.conexiones.setdefault(sala_id, [])
+            self._activar_sala(sala_bd)
 
         sala = self.salas_activas[sala_id]
+        jugadores = self.jugadores_de(sala)
 
-        if any(j.id == jugador.id for j in sala.jugadores):
+        if jugador.id in jugadores:
             return sala
 
-        if len(sala.jugadores) >= sala.max_jugadores:
+        if len(jugadores) >= sala.max_jugadores:
             return None
 
-        sala.jugadores.append(jugador)
-        self.base_datos.actualizar_sala(sala)
+        jugadores.agregar(jugador)
+        self.sala_modificada(sala)
 
         asyncio.create_task(self.transmitir_a_sala(sala_id, {
             "tipo": "jugador_unido",
@@ -250,18 +410,14 @@ class AdministradorJuego:
         sala.estado = "jugando"
         sala.ronda_actual += 1
         sala.tiempo_inicio = datetime.now()
-        sala.frase_actual = random.choice(self.frases_terror)
+        sala.frase_actual = self._siguiente_frase(sala)
+        self._rondas[sala_id] = RondaEscritura(self._frase_compilada(sala.frase_actual))
 
-        for j in sala.jugadores:
-            j.estado = EstadoJugador.JUGANDO
-            j.errores = 0
-            j.progreso = 0
-            j.ppm = 0
+        self.jugadores_de(sala).reiniciar_ronda()
 
-        try:
-            self.base_datos.actualizar_sala(sala)
-        except Exception as e:
-            logging.error(f"No se pudo actualizar sala {sala_id}: {e}")
+        # transición crítica: se escribe ya, sin esperar al siguiente ciclo
+        self.sala_modificada(sala)
+        await self.persistencia.vaciar_sala(sala_id)
 
         await self.transmitir_a_sala(sala_id, {
             "tipo": "partida_iniciada",
@@ -272,26 +428,19 @@ class AdministradorJuego:
 
         # monitor de tiempo
         if sala_id in self._monitores_tiempo:
-            old = self._monitores_tiempo.pop(sala_id)
-            try:
-                old.cancel()
-            except:
-                pass
+            self._monitores_tiempo.pop(sala_id).cancelar()
 
-        tarea = asyncio.create_task(self._monitor_tiempo_ronda(sala_id, sala.tiempo_limite))
-        self._monitores_tiempo[sala_id] = tarea
+        self._monitores_tiempo[sala_id] = self._programar_en_sala(
+            sala.tiempo_limite, sala_id, self._tiempo_agotado, sala_id, tipo="ronda"
+        )
 
         logging.info(f"Partida iniciada en sala {sala_id}, frase: {sala.frase_actual.texto}")
 
     # ======================================================
     # ================   MONITOR TIEMPO   =================
     # ======================================================
-    async def _monitor_tiempo_ronda(self, sala_id: str, tiempo_limite: int):
-        try:
-            await asyncio.sleep(tiempo_limite)
-        except asyncio.CancelledError:
-            logging.debug(f"Monitor de tiempo cancelado para sala {sala_id}")
-            return
+    async def _tiempo_agotado(self, sala_id: str):
+        self._monitores_tiempo.pop(sala_id, None)
 
         if sala_id not in self.salas_activas:
             return
@@ -303,19 +452,21 @@ class AdministradorJuego:
 
         logging.debug(f"Tiempo agotado para sala {sala_id}, procesando jugadores restantes")
 
-        for j in sala.jugadores:
+        jugadores = self.jugadores_de(sala)
+        for j in list(sala.jugadores):
             if j.estado == EstadoJugador.JUGANDO and j.progreso < 100:
-                j.estado = EstadoJugador.ELIMINADO
+                jugadores.cambiar_estado(j, EstadoJugador.ELIMINADO)
+                self.sala_modificada(sala)
                 await self.transmitir_a_sala(sala_id, {
                     "tipo": "jugador_eliminado",
                     "jugador_id": j.id,
                     "razon": "tiempo"
                 })
 
-        vivos = [j for j in sala.jugadores if j.estado == EstadoJugador.JUGANDO]
+        unico = jugadores.unico_vivo()
 
-        if len(vivos) == 1:
-            await self.finalizar_partida(sala_id, vivos[0].id)
+        if unico:
+            await self.finalizar_partida(sala_id, unico.id)
         else:
             mejor = max(sala.jugadores, key=lambda x: (x.progreso, x.ppm), default=None)
             ganador = mejor.id if mejor else None
@@ -329,53 +480,116 @@ class AdministradorJuego:
             return
 
         sala = self.salas_activas[sala_id]
-        jugador = next((x for x in sala.jugadores if x.id == jugador_id), None)
+        jugador = self.buscar_jugador(sala, jugador_id)
 
-        if not jugador or jugador.estado != EstadoJugador.JUGANDO:
+        if not jugador or jugador.estado != EstadoJugador.JUGANDO or jugador.progreso >= 100:
             return
 
-        frase = sala.frase_actual.texto.strip()
-        correcto = texto.strip() == frase
+        frase = self._frase_compilada(sala.frase_actual)
+        texto = normalizar_texto(texto)
+        correcto = texto == frase.texto
+        if not correcto and ESCRITURA_TOLERAR_ACENTOS:
+            correcto = plegar_acentos(texto) == frase.texto_plegado
 
         if correcto:
-            palabras = len(frase.split())
-            jugador.ppm = int((palabras / tiempo_tomado) * 60) if tiempo_tomado > 0 else 0
-            jugador.progreso = 100
-            jugador.estado = EstadoJugador.JUGADO
-
-            await self.transmitir_a_sala(sala_id, {
-                "tipo": "jugador_completo",
-                "jugador_id": jugador.id,
-                "ppm": jugador.ppm
-            })
+            palabras = frase.num_palabras
+            ppm = int((palabras / tiempo_tomado) * 60) if tiempo_tomado > 0 else 0
+            await self._jugador_completo(sala, jugador, ppm)
 
         else:
-            jugador.errores += 1
-            jugador.progreso = max(0, jugador.progreso - 10)
+            self.jugadores_de(sala).cambiar_progreso(jugador, max(0, jugador.progreso - 10))
+            await self._error_escritura(sala, jugador)
+
+        self.sala_modificada(sala)
+        await self._verificar_fin_ronda(sala)
+
+    async def procesar_escritura_delta(self, jugador_id: str, sala_id: str, agregado: str, cursor: int):
+        """
+        Modo streaming: el cliente manda solo lo que agregó desde `cursor`.
+        Se valida contra la frase compilada de la ronda en O(len(agregado)).
+        """
+        if not isinstance(agregado, str) or not isinstance(cursor, int):
+            return
+
+        sala = self.salas_activas.get(sala_id)
+        ronda = self._ronda_de(sala) if sala else None
+        if not ronda:
+            return
+
+        jugador = self.buscar_jugador(sala, jugador_id)
+        if not jugador or jugador.estado != EstadoJugador.JUGANDO or jugador.progreso >= 100:
+            return
 
+        progreso = ronda.progreso_de(jugador_id, jugador.progreso)
+        resultado = progreso.aplicar(ronda.frase, agregado, cursor)
+
+        if resultado.aceptados:
+            self.jugadores_de(sala).cambiar_progreso(jugador, progreso.progreso(ronda.frase))
+            jugador.ppm = progreso.ppm(ronda.frase)
+
+        if resultado.completo:
+            await self._jugador_completo(sala, jugador, jugador.ppm)
+        else:
+            # también sirve al cliente para resincronizar su cursor
             await self.transmitir_a_sala(sala_id, {
-                "tipo": "jugador_error",
+                "tipo": "jugador_progreso",
                 "jugador_id": jugador.id,
-                "errores_actuales": jugador.errores
+                "progreso": jugador.progreso,
+                "ppm": jugador.ppm,
+                "cursor": progreso.cursor
             })
+            if resultado.error:
+                await self._error_escritura(sala, jugador)
+
+        if resultado.aceptados or resultado.error:
+            self.sala_modificada(sala)
+        if resultado.completo or resultado.error:
+            await self._verificar_fin_ronda(sala)
+
+    def _ronda_de(self, sala: Sala) -> Optional[RondaEscritura]:
+        ronda = self._rondas.get(sala.id)
+        if ronda is None and sala.estado == "jugando" and sala.frase_actual and sala.tiempo_inicio:
+            # la ronda la inició otro worker (estado compartido): se reconstruye
+            transcurrido = (datetime.now() - sala.tiempo_inicio).total_seconds()
+            ronda = self._rondas[sala.id] = RondaEscritura(self._frase_compilada(sala.frase_actual), transcurrido)
+        return ronda
+
+    async def _jugador_completo(self, sala: Sala, jugador: Jugador, ppm: int):
+        # sigue en JUGANDO: el fin de ronda cuenta a los completados por progreso
+        jugador.ppm = ppm
+        self.jugadores_de(sala).cambiar_progreso(jugador, 100)
+
+        await self.transmitir_a_sala(sala.id, {
+            "tipo": "jugador_completo",
+            "jugador_id": jugador.id,
+            "ppm": jugador.ppm
+        })
 
-            if jugador.errores >= 3:
-                await self.eliminar_jugador(jugador_id, sala_id)
+    async def _error_escritura(self, sala: Sala, jugador: Jugador):
+        jugador.errores += 1
 
-        try:
-            self.base_datos.actualizar_sala(sala)
-        except:
-            pass
+        await self.transmitir_a_sala(sala.id, {
+            "tipo": "jugador_error",
+            "jugador_id": jugador.id,
+            "errores_actuales": jugador.errores
+        })
 
-        vivos = [j for j in sala.jugadores if j.estado == EstadoJugador.JUGANDO]
-        completados = [j for j in sala.jugadores if j.progreso == 100]
+        if jugador.errores >= 3:
+            await self.eliminar_jugador(jugador.id, sala.id)
 
-        if len(completados) == len(sala.jugadores):
+    async def _verificar_fin_ronda(self, sala: Sala):
+        if sala.estado != "jugando":
+            return
+
+        jugadores = self.jugadores_de(sala)
+
+        if jugadores.completados == len(jugadores):
+            # solo al terminar se recorre la sala
             mejor = max(sala.jugadores, key=lambda x: x.ppm)
-            await self.finalizar_partida(sala_id, mejor.id)
+            await self.finalizar_partida(sala.id, mejor.id)
 
-        elif len(vivos) == 1 and len(sala.jugadores) > 1:
-            await self.finalizar_partida(sala_id, vivos[0].id)
+        elif jugadores.vivos == 1 and len(jugadores) > 1:
+            await self.finalizar_partida(sala.id, jugadores.unico_vivo().id)
 
     # ======================================================
     # ================   ELIMINAR JUGADOR   ===============
@@ -385,11 +599,13 @@ class AdministradorJuego:
         if not sala:
             return
 
-        jugador = next((x for x in sala.jugadores if x.id == jugador_id), None)
+        jugadores = self.jugadores_de(sala)
+        jugador = jugadores.obtener(jugador_id)
         if not jugador:
             return
 
-        jugador.estado = EstadoJugador.ELIMINADO
+        jugadores.cambiar_estado(jugador, EstadoJugador.ELIMINADO)
+        self.sala_modificada(sala)
 
         await self.transmitir_a_sala(sala_id, {
             "tipo": "jugador_eliminado",
@@ -397,11 +613,9 @@ class AdministradorJuego:
             "razon": "errores"
         })
 
-        vivos = [j for j in sala.jugadores if j.estado == EstadoJugador.JUGANDO]
-
-        if len(vivos) == 1:
-            await self.finalizar_partida(sala_id, vivos[0].id)
-        elif len(vivos) == 0:
+        if jugadores.vivos == 1:
+            await self.finalizar_partida(sala_id, jugadores.unico_vivo().id)
+        elif jugadores.vivos == 0:
             await self.finalizar_partida(sala_id, None)
 
     # ======================================================
@@ -411,16 +625,19 @@ class AdministradorJuego:
         if sala_id not in self.salas_activas:
             return
 
+        # leída bajo el bloqueo de la sala: incluye lo que guardaron otros workers
         sala = self.salas_activas[sala_id]
 
+        # ya terminada por otro evento de la misma ronda (de este u otro worker)
+        if sala.estado != "jugando":
+            return
+
         if sala_id in self._monitores_tiempo:
-            try:
-                self._monitores_tiempo[sala_id].cancel()
-            except:
-                pass
-            self._monitores_tiempo.pop(sala_id, None)
+            self._monitores_tiempo.pop(sala_id).cancelar()
 
         sala.estado = "finalizada"
+        self.sala_modificada(sala)
+        await self.persistencia.vaciar_sala(sala_id)
 
         partida = Partida(
             id=f"partida_{int(datetime.now().timestamp() * 1000)}",
@@ -432,11 +649,19 @@ class AdministradorJuego:
             fecha=datetime.now()
         )
 
+        filas = []
         try:
-            self.base_datos.guardar_partida(partida)
+            filas = await self.base_datos.guardar_partida(partida)
             logging.info(f"Partida guardada en DB: {partida.id}")
         except:
             pass
+        try:
+            self.clasificaciones.actualizar_filas(filas)
+        except Exception as e:
+            # las tablas se corrigen en la próxima sincronización; la partida termina igual
+            logging.error(f"No se pudieron actualizar las clasificaciones con {partida.id}: {e}")
+        # a todos los workers (este incluido): cualquiera pudo cachear a estos jugadores
+        self.bus.publicar(sala_id, json.dumps([j.id for j in sala.jugadores]), CLASE_INVALIDAR_ESTADISTICAS)
 
         await self.transmitir_a_sala(sala_id, {
             "tipo": "partida_finalizada",
@@ -444,17 +669,74 @@ class AdministradorJuego:
             "estadisticas": [self._serializar_jugador(j) for j in sala.jugadores]
         })
 
-        asyncio.create_task(self._eliminar_sala_despues(sala_id, 30))
+        self._programar_en_sala(30, sala_id, self.eliminar_sala, sala_id, tipo="limpieza")
+
+    # ======================================================
+    # ================   ESTADÍSTICAS   ====================
+    # ======================================================
+    def _invalidar_estadisticas(self, sala_id: str, texto: str, clase: str):
+        for jugador_id in json.loads(texto):
+            self.cache_estadisticas.invalidar(jugador_id)
+
+    async def estadisticas_jugador(self, jugador_id: str) -> Tuple[dict, str]:
+        """Estadísticas del jugador y su ETag, desde caché mientras no juegue otra partida."""
+        return await self.cache_estadisticas.obtener(jugador_id, lambda: self._calcular_estadisticas(jugador_id))
+
+    async def _calcular_estadisticas(self, jugador_id: str) -> Tuple[dict, str]:
+        inicio = time.perf_counter()
+        datos = (await self.base_datos.obtener_estadisticas_jugador(jugador_id)).dict()
+        self._recalculo_estadisticas.registrar(time.perf_counter() - inicio)
+        etag = hashlib.blake2b(json.dumps(datos, sort_keys=True).encode(), digest_size=8).hexdigest()
+        return datos, f'"{etag}"'
+
+    def metricas_estadisticas(self) -> dict:
+        return {**self.cache_estadisticas.metricas(), "recalculo": self._recalculo_estadisticas.resumen()}
+
+    # ======================================================
+    # ================   RECONEXIÓN   ======================
+    # ======================================================
+    def programar_remocion(self, jugador_id: str, sala_id: str, segundos: int = 25):
+        # ventana para reconectar antes de sacarlo de la sala
+        clave = (sala_id, jugador_id)
+        if clave in self._reconexiones:
+            self._reconexiones.pop(clave).cancelar()
+        self._reconexiones[clave] = self._programar_en_sala(
+            segundos, sala_id, self._remover_si_no_reconecta, jugador_id, sala_id, tipo="reconexion"
+        )
+
+    def reconectar_jugador(self, jugador_id: str, sala_id: str):
+        temporizador = self._reconexiones.pop((sala_id, jugador_id), None)
+        if temporizador:
+            temporizador.cancelar()
+
+        sala = self.salas_activas.get(sala_id)
+        jugador = self.buscar_jugador(sala, jugador_id) if sala else None
+        if jugador and not jugador.conectado:
+            jugador.conectado = True
+            self.sala_modificada(sala)
+            logging.debug(f"Jugador {jugador_id} reconectado a sala {sala_id}")
+
+    async def _remover_si_no_reconecta(self, jugador_id: str, sala_id: str):
+        self._reconexiones.pop((sala_id, jugador_id), None)
+
+        sala = self.salas_activas.get(sala_id)
+        if not sala:
+            return
+        jugador = self.buscar_jugador(sala, jugador_id)
+        if jugador and not getattr(jugador, "conectado", True):
+            await self.abandonar_sala(jugador_id, sala_id)
+            try:
+                await self.enviar_estado_sala(sala_id)
+            except Exception:
+                pass
 
     # ======================================================
     # ================   LIMPIEZA   ========================
     # ======================================================
-    async def _eliminar_sala_despues(self, sala_id: str, segundos: int):
-        await asyncio.sleep(segundos)
-        self.eliminar_sala(sala_id)
 
-    def eliminar_sala(self, sala_id: str):
-        if sala_id in self.salas_activas:
+    async def eliminar_sala(self, sala_id: str):
+        sala = self.salas_activas.get(sala_id)
+        if sala:
             asyncio.create_task(self.transmitir_a_sala(sala_id, {
                 "tipo": "sala_eliminada",
                 "sala_id": sala_id
@@ -462,34 +744,84 @@ class AdministradorJuego:
             del self.salas_activas[sala_id]
             logging.info(f"Sala eliminada: {sala_id}")
 
+        # termina después de este evento; lo que llegue luego ya no encuentra la sala
+        self._olvidar_sala(sala_id, sala)
+        try:
+            await self.base_datos.eliminar_sala(sala_id)
+        except:
+            pass
+
+    def _sala_desaparecida(self, sala: Sala):
+        # otro worker la eliminó (almacén compartido): soltar lo que este tenía
+        logging.info(f"Sala eliminada por otro worker: {sala.id}")
+        self._olvidar_sala(sala.id, sala)
+
+    def _olvidar_sala(self, sala_id: str, sala: Optional[Sala]):
+        """Todo lo que este proceso guarda de una sala: código, sockets, temporizadores, índices y actor."""
+        if sala and self._codigos.get(sala.codigo) == sala_id:
+            del self._codigos[sala.codigo]
+
         if sala_id in self.conexiones:
-            for ws in list(self.conexiones[sala_id]):
+            for conexion in list(self.conexiones[sala_id]):
                 try:
-                    asyncio.create_task(ws.close())
+                    asyncio.create_task(conexion.cerrar())
                 except:
                     pass
             del self.conexiones[sala_id]
+        self.transmisor.olvidar_sala(sala_id)
 
-        try:
-            self.base_datos.eliminar_sala(sala_id)
-        except:
-            pass
+        if sala_id in self._monitores_tiempo:
+            self._monitores_tiempo.pop(sala_id).cancelar()
+        for clave in [c for c in self._reconexiones if c[0] == sala_id]:
+            self._reconexiones.pop(clave).cancelar()
+
+        self.persistencia.descartar(sala_id)
+        self._rondas.pop(sala_id, None)
+        self._mazos.pop(sala_id, None)
+        self._jugadores.pop(sala_id, None)
+        self.actores.retirar(sala_id)
 
     # ======================================================
     # ================   ENVÍO WS   =======================
     # ======================================================
+    def registrar_conexion(self, sala_id: str, websocket: WebSocket) -> ConexionSala:
+        return self.transmisor.registrar(sala_id, websocket)
+
+    def quitar_conexion(self, sala_id: str, websocket: WebSocket):
+        conexion = self.transmisor.buscar(sala_id, websocket)
+        if conexion:
+            self.transmisor.quitar(conexion)
+
     async def transmitir_a_sala(self, sala_id: str, mensaje: dict):
-        if sala_id not in self.conexiones:
+        await self.transmisor.transmitir(sala_id, mensaje)
+
+    async def enviar_estado_sala(self, sala_id: str):
+        sala = self.salas_activas.get(sala_id)
+        if not sala:
             return
-        for ws in self.conexiones[sala_id]:
-            try:
-                await ws.send_json(mensaje)
-            except Exception as e:
-                logging.warning(f"Fallo al enviar WS: {e}")
+        # foto completa: si el cliente va lento, solo le llega la última
+        await self.transmitir_a_sala(sala_id, {
+            "tipo": "estado_sala",
+            "sala": self._serializar_sala(sala)
+        })
 
     # ======================================================
     # ================   SERIALIZACIÓN   ==================
     # ======================================================
+    def _serializar_sala(self, sala: Sala) -> dict:
+        return {
+            "id": sala.id,
+            "codigo": sala.codigo,
+            "tipo": sala.tipo,
+            "estado": sala.estado,
+            "jugador_anfitrion": sala.jugador_anfitrion,
+            "max_jugadores": sala.max_jugadores,
+            "ronda_actual": sala.ronda_actual,
+            "tiempo_limite": sala.tiempo_limite,
+            "frase": sala.frase_actual.texto if sala.frase_actual else None,
+            "jugadores": [self._serializar_jugador(j) for j in sala.jugadores]
+        }
+
     def _serializar_jugador(self, jugador: Jugador) -> dict:
         return {
             "id": jugador.id,
@@ -0,0 +1,155 @@
+# backend/importar_frases.py
+"""
+Importación masiva de frases a MongoDB desde archivos JSONL o CSV.
+
+Lee en streaming (memoria constante: solo el lote en curso), valida y
+normaliza cada frase y escribe en lotes con insert_many sin orden. Los
+duplicados por texto normalizado (dentro del archivo o contra lo que ya hay
+en la colección) los rechaza el índice único de `clave`; las frases cargadas
+antes de existir `clave` necesitan una vez completar_claves_frases.py.
+
+Formato: una frase por línea en JSONL ({"texto": ..., "dificultad": ...,
+"categoria": ...}) o CSV con cabecera texto,dificultad,categoria.
+
+Uso:
+    python importar_frases.py frases.jsonl [otra.csv ...] [--lote 1000]
+"""
+import argparse
+import csv
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from frases import clave_frase, normalizar_texto
+
+LARGO_MIN = 3
+LARGO_MAX = 300
+DIFICULTAD_DEFECTO = "media"
+CATEGORIA_DEFECTO = "terror"
+# dificultad termina siendo parte de una ruta de campo en MongoDB
+# (mejor_ppm_dificultad.<dificultad>): nada de puntos, $ ni espacios
+TOKEN_VALIDO = re.compile(r"[a-z0-9_-]+")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+# ======================================================
+# ================   LECTURA   =========================
+# ======================================================
+def leer_jsonl(ruta: str) -> Iterator[dict]:
+    with open(ruta, encoding="utf-8") as archivo:
+        for n, linea in enumerate(archivo, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError:
+                logging.warning(f"{ruta}:{n}: JSON inválido")
+                yield {}
+                continue
+            yield fila if isinstance(fila, dict) else {}
+
+
+def leer_csv(ruta: str) -> Iterator[dict]:
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        yield from csv.DictReader(archivo)
+
+
+def leer_archivo(ruta: str) -> Iterator[dict]:
+    return leer_csv(ruta) if ruta.lower().endswith(".csv") else leer_jsonl(ruta)
+
+
+# ======================================================
+# ================   VALIDACIÓN   ======================
+# ======================================================
+def preparar_frase(fila: dict, ahora: Optional[datetime] = None) -> Optional[dict]:
+    """Documento listo para insertar, o None si la fila no sirve."""
+    texto = normalizar_texto(str(fila.get("texto") or ""))
+    if not (LARGO_MIN <= len(texto) <= LARGO_MAX):
+        return None
+    dificultad = (str(fila.get("dificultad") or "").strip().lower()) or DIFICULTAD_DEFECTO
+    categoria = (str(fila.get("categoria") or "").strip().lower()) or CATEGORIA_DEFECTO
+    if not (TOKEN_VALIDO.fullmatch(dificultad) and TOKEN_VALIDO.fullmatch(categoria)):
+        return None
+    return {
+        "texto": texto,
+        "clave": clave_frase(texto),
+        "dificultad": dificultad,
+        "categoria": categoria,
+        "fecha_agregada": ahora or datetime.now(),
+    }
+
+
+class ImportadorFrases:
+    def __init__(self, base_datos, lote: int = 1000):
+        self.base_datos = base_datos
+        self.lote = lote
+
+        self.leidas = 0
+        self.invalidas = 0
+        self.duplicadas = 0
+        self.insertadas = 0
+        self.lotes = 0
+        self._inicio = time.perf_counter()
+
+    def _escribir(self, lote: List[dict]):
+        insertadas, duplicadas = self.base_datos.insertar_frases(lote)
+        self.insertadas += insertadas
+        self.duplicadas += duplicadas
+        self.lotes += 1
+        if self.lotes % 50 == 0:
+            logging.info(self.informe())
+
+    def importar(self, filas: Iterable[dict]):
+        ahora = datetime.now()
+        lote: List[dict] = []
+        for fila in filas:
+            self.leidas += 1
+            doc = preparar_frase(fila, ahora)
+            if doc is None:
+                self.invalidas += 1
+                continue
+
+            lote.append(doc)
+            if len(lote) >= self.lote:
+                self._escribir(lote)
+                lote = []
+
+        if lote:
+            self._escribir(lote)
+
+    def resumen(self) -> Dict[str, float]:
+        segundos = time.perf_counter() - self._inicio
+        return {
+            "leidas": self.leidas,
+            "insertadas": self.insertadas,
+            "duplicadas": self.duplicadas,
+            "invalidas": self.invalidas,
+            "segundos": round(segundos, 2),
+            "frases_por_segundo": round(self.leidas / segundos) if segundos else 0,
+        }
+
+    def informe(self) -> str:
+        r = self.resumen()
+        return (f"{r['leidas']} leídas, {r['insertadas']} insertadas, {r['duplicadas']} duplicadas, "
+                f"{r['invalidas']} inválidas en {r['segundos']}s ({r['frases_por_segundo']} frases/s)")
+
+
+if __name__ == "__main__":
+    from database import BaseDatos
+
+    parser = argparse.ArgumentParser(description="Importa frases desde JSONL/CSV a MongoDB")
+    parser.add_argument("archivos", nargs="+")
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    importador = ImportadorFrases(BaseDatos(), lote=args.lote)
+    for ruta in args.archivos:
+        logging.info(f"Importando {ruta}")
+        importador.importar(leer_archivo(ruta))
+
+    print(f"✔ {importador.informe()}")
@@ -0,0 +1,111 @@
+# backend/jugadores_sala.py
+from typing import Dict, Optional, Set
+
+from models import Sala, Jugador, EstadoJugador
+
+
+class IndiceJugadores:
+    """
+    Vista en tiempo de ejecución de los jugadores de una sala: id -> jugador
+    y los conjuntos de vivos / completados / eliminados, que se actualizan en
+    cada transición. Buscar un jugador y revisar el fin de ronda es O(1) en vez
+    de recorrer `sala.jugadores` en cada mensaje.
+
+    `sala.jugadores` sigue siendo la lista que se persiste; altas y bajas se
+    hacen por aquí para que ambas cosas no se separen.
+    """
+
+    def __init__(self, sala: Sala):
+        self.sala = sala
+        self._por_id: Dict[str, Jugador] = {}
+        self._vivos: Set[str] = set()
+        self._completados: Set[str] = set()
+        self._eliminados: Set[str] = set()
+        for jugador in sala.jugadores:
+            self._indexar(jugador)
+
+    def _indexar(self, jugador: Jugador):
+        self._por_id[jugador.id] = jugador
+        self._clasificar(jugador)
+
+    def _clasificar(self, jugador: Jugador):
+        jid = jugador.id
+        self._vivos.discard(jid)
+        self._eliminados.discard(jid)
+        self._completados.discard(jid)
+        if jugador.estado == EstadoJugador.JUGANDO:
+            self._vivos.add(jid)
+        elif jugador.estado == EstadoJugador.ELIMINADO:
+            self._eliminados.add(jid)
+        if jugador.progreso >= 100:
+            self._completados.add(jid)
+
+    # ======================================================
+    # ================   CONSULTAS   =======================
+    # ======================================================
+    def obtener(self, jugador_id: str) -> Optional[Jugador]:
+        return self._por_id.get(jugador_id)
+
+    def __contains__(self, jugador_id: str) -> bool:
+        return jugador_id in self._por_id
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    @property
+    def vivos(self) -> int:
+        return len(self._vivos)
+
+    @property
+    def completados(self) -> int:
+        return len(self._completados)
+
+    @property
+    def eliminados(self) -> int:
+        return len(self._eliminados)
+
+    def unico_vivo(self) -> Optional[Jugador]:
+        if len(self._vivos) != 1:
+            return None
+        return self._por_id[next(iter(self._vivos))]
+
+    def sincronizado(self, sala: Sala) -> bool:
+        # el almacén puede devolver otro objeto si la sala se recargó
+        return self.sala is sala and len(self._por_id) == len(sala.jugadores)
+
+    # ======================================================
+    # ================   TRANSICIONES   ====================
+    # ======================================================
+    def agregar(self, jugador: Jugador):
+        self.sala.jugadores.append(jugador)
+        self._indexar(jugador)
+
+    def quitar(self, jugador_id: str) -> Optional[Jugador]:
+        jugador = self._por_id.pop(jugador_id, None)
+        if jugador:
+            self.sala.jugadores.remove(jugador)
+            self._vivos.discard(jugador_id)
+            self._completados.discard(jugador_id)
+            self._eliminados.discard(jugador_id)
+        return jugador
+
+    def cambiar_estado(self, jugador: Jugador, estado: EstadoJugador):
+        jugador.estado = estado
+        self._clasificar(jugador)
+
+    def cambiar_progreso(self, jugador: Jugador, progreso: float):
+        jugador.progreso = progreso
+        if progreso >= 100:
+            self._completados.add(jugador.id)
+        else:
+            self._completados.discard(jugador.id)
+
+    def reiniciar_ronda(self):
+        for jugador in self.sala.jugadores:
+            jugador.estado = EstadoJugador.JUGANDO
+            jugador.errores = 0
+            jugador.progreso = 0
+            jugador.ppm = 0
+        self._vivos = set(self._por_id)
+        self._completados = set()
+        self._eliminados = set()
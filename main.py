@@ -1,40 +1,52 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+import time
+
+# desde acá se mide el arranque (imports incluidos)
+_INICIO_PROCESO = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-import bcrypt
 
 from models import Jugador, TipoSala
-from game_controller import juego
+from game_controller import crear_juego, obtener_juego
+from game_manager import AdministradorJuego
 from routes_ws import router as ws_router
+from seguridad import PoolHash, PoolHashSaturado
+from clasificacion import TIPOS as TIPOS_CLASIFICACION
+from config import ARRANQUE_PRESUPUESTO, ARRANQUE_REINTENTO_MAX
 
-app = FastAPI(title="Final Sentence API", version="1.0.0")
+router = APIRouter()
 
-# ------------------------ CORS ------------------------
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# ------------------------ ROUTES WS ------------------------
-app.include_router(ws_router)
+def obtener_pool_hash(request: Request) -> PoolHash:
+    # bcrypt fuera del event loop, con concurrencia acotada (uno por app)
+    return request.app.state.pool_hash
+
 
 # ------------------------ AUTH ------------------------
-@app.post("/auth/register")
-async def registrar(nombre: str, password: str):
+@router.post("/auth/register")
+async def registrar(nombre: str, password: str,
+                    juego: AdministradorJuego = Depends(obtener_juego),
+                    pool_hash: PoolHash = Depends(obtener_pool_hash)):
 
     if len(password) < 4:
         raise HTTPException(400, "La contraseña debe tener mínimo 4 caracteres")
 
     # nombre único
-    existente = juego.base_datos.obtener_jugador_por_nombre(nombre)
+    existente = await juego.base_datos.obtener_jugador_por_nombre(nombre)
     if existente:
         raise HTTPException(409, "Ese nombre ya está en uso")
 
     jugador_id = f"jugador_{abs(hash(nombre)) % (10**12)}"
-    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    try:
+        password_hash = await pool_hash.hashear(password)
+    except PoolHashSaturado as e:
+        raise HTTPException(503, str(e))
 
     jugador = Jugador(
         id=jugador_id,
@@ -43,7 +55,7 @@ async def registrar(nombre: str, password: str):
         password_hash=password_hash
     )
 
-    juego.base_datos.guardar_jugador(jugador)
+    await juego.base_datos.guardar_jugador(jugador)
 
     return {
         "mensaje": "Cuenta creada",
@@ -55,15 +67,22 @@ async def registrar(nombre: str, password: str):
     }
 
 
-@app.post("/auth/login")
-async def login(nombre: str, password: str):
-    data = juego.base_datos.obtener_jugador_por_nombre(nombre)
+@router.post("/auth/login")
+async def login(nombre: str, password: str,
+                juego: AdministradorJuego = Depends(obtener_juego),
+                pool_hash: PoolHash = Depends(obtener_pool_hash)):
+    data = await juego.base_datos.obtener_jugador_por_nombre(nombre)
     if not data:
         raise HTTPException(404, "Usuario no encontrado")
 
     password_hash = data.get("password_hash", "")
 
-    if not bcrypt.checkpw(password.encode(), password_hash.encode()):
+    try:
+        correcto = await pool_hash.verificar(password, password_hash)
+    except PoolHashSaturado as e:
+        raise HTTPException(503, str(e))
+
+    if not correcto:
         raise HTTPException(401, "Contraseña incorrecta")
 
     return {
@@ -76,41 +95,242 @@ async def login(nombre: str, password: str):
     }
 
 # ------------------------ HTTP ENDPOINTS ------------------------
-@app.post("/jugador/nuevo")
-async def crear_jugador(nombre: str, avatar: str = "default"):
+@router.post("/jugador/nuevo")
+async def crear_jugador(nombre: str, avatar: str = "default",
+                        juego: AdministradorJuego = Depends(obtener_juego)):
     jugador_id = f"jugador_{abs(hash(nombre)) % (10**12)}"
     jugador = Jugador(id=jugador_id, nombre=nombre, avatar=avatar)
-    juego.base_datos.guardar_jugador(jugador)
+    await juego.base_datos.guardar_jugador(jugador)
     return jugador.dict()
 
 
-@app.get("/jugador/{jugador_id}/estadisticas")
-async def obtener_estadisticas(jugador_id: str):
-    stats = juego.base_datos.obtener_estadisticas_jugador(jugador_id)
-    return stats.dict()
+@router.get("/jugador/{jugador_id}/estadisticas")
+async def obtener_estadisticas(jugador_id: str, request: Request,
+                               juego: AdministradorJuego = Depends(obtener_juego)):
+    stats, etag = await juego.estadisticas_jugador(jugador_id)
+    # el cliente ya tiene esta versión: sin cuerpo
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(stats, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 
-@app.post("/sala/crear")
-async def crear_sala(jugador_id: str, tipo: TipoSala, max_jugadores: int = 10):
-    jugador = juego.base_datos.obtener_jugador(jugador_id)
-    sala = juego.crear_sala(jugador, tipo, max_jugadores)
+@router.post("/sala/crear")
+async def crear_sala(jugador_id: str, tipo: TipoSala, max_jugadores: int = 10,
+                     dificultad: Optional[str] = None, categoria: Optional[str] = None,
+                     juego: AdministradorJuego = Depends(obtener_juego)):
+    jugador = await juego.base_datos.obtener_jugador(jugador_id)
+    sala = await juego.crear_sala(jugador, tipo, max_jugadores, dificultad, categoria)
     return sala.dict()
 
 
-@app.post("/sala/unir")
-async def unir_sala(jugador_id: str, codigo_sala: str):
-    jugador = juego.base_datos.obtener_jugador(jugador_id)
-    sala = juego.unir_sala(jugador, codigo_sala)
+@router.post("/sala/unir")
+async def unir_sala(jugador_id: str, codigo_sala: str, juego: AdministradorJuego = Depends(obtener_juego)):
+    jugador = await juego.base_datos.obtener_jugador(jugador_id)
+    sala = await juego.unir_sala(jugador, codigo_sala)
     return sala.dict() if sala else {"error": "Sala no encontrada"}
 
 
-@app.post("/sala/{sala_id}/iniciar")
-async def iniciar_partida(sala_id: str):
-    await juego.iniciar_partida(sala_id)
+@router.post("/sala/{sala_id}/iniciar")
+async def iniciar_partida(sala_id: str, juego: AdministradorJuego = Depends(obtener_juego)):
+    if sala_id not in juego.salas_activas:
+        raise HTTPException(404, "Sala no encontrada")
+    await juego.en_sala(sala_id, juego.iniciar_partida, sala_id)
     return {"mensaje": "Partida iniciada"}
 
 
+@router.get("/frases/filtros")
+async def filtros_frases(juego: AdministradorJuego = Depends(obtener_juego)):
+    return {
+        "dificultades": juego.indice_frases.dificultades(),
+        "categorias": juego.indice_frases.categorias()
+    }
+
+
+@router.post("/frases/recargar")
+async def recargar_frases(juego: AdministradorJuego = Depends(obtener_juego)):
+    recargado = await juego.catalogo.recargar(forzar=True)
+    return {"recargado": recargado, "frases": len(juego.indice_frases)}
+
+
+# ------------------------ CLASIFICACIÓN ------------------------
+def _tabla_clasificacion(juego: AdministradorJuego, tipo: str, dificultad: Optional[str]) -> str:
+    if tipo not in TIPOS_CLASIFICACION:
+        raise HTTPException(404, f"Clasificación desconocida: {tipo}")
+    return juego.clasificaciones.nombre_tabla(tipo, dificultad)
+
+
+@router.get("/clasificacion/{tipo}")
+async def clasificacion(tipo: str, limite: int = 10, desde: int = 0, dificultad: Optional[str] = None,
+                        juego: AdministradorJuego = Depends(obtener_juego)):
+    tabla = _tabla_clasificacion(juego, tipo, dificultad)
+    limite = max(1, min(limite, 100))
+    return {
+        "tipo": tabla,
+        "total": juego.clasificaciones.total(tabla),
+        "posiciones": juego.clasificaciones.top(tabla, limite, max(0, desde))
+    }
+
+
+@router.get("/clasificacion/{tipo}/jugador/{jugador_id}")
+async def posicion_jugador(tipo: str, jugador_id: str, dificultad: Optional[str] = None,
+                           juego: AdministradorJuego = Depends(obtener_juego)):
+    tabla = _tabla_clasificacion(juego, tipo, dificultad)
+    posicion = juego.clasificaciones.posicion(tabla, jugador_id)
+    if posicion is None:
+        raise HTTPException(404, "Jugador sin posición en esta clasificación")
+    return posicion
+
+
+# ------------------------ MÉTRICAS ------------------------
+@router.get("/metricas/transmision")
+async def metricas_transmision(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.transmisor.metricas()
+
+
+@router.get("/metricas/persistencia")
+async def metricas_persistencia(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.persistencia.metricas()
+
+
+@router.get("/metricas/catalogo")
+async def metricas_catalogo(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.catalogo.metricas()
+
+
+@router.get("/metricas/clasificacion")
+async def metricas_clasificacion(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.clasificaciones.metricas()
+
+
+@router.get("/metricas/estadisticas")
+async def metricas_estadisticas(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.metricas_estadisticas()
+
+
+@router.get("/metricas/temporizadores")
+async def metricas_temporizadores(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.temporizadores.metricas()
+
+
+@router.get("/metricas/actores")
+async def metricas_actores(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.actores.metricas()
+
+
+@router.get("/metricas/jugadores")
+async def metricas_jugadores(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.base_datos.cache_jugadores.metricas()
+
+
+@router.get("/metricas/mongo")
+async def metricas_mongo(juego: AdministradorJuego = Depends(obtener_juego)):
+    return juego.base_datos.metricas()
+
+
+@router.get("/metricas/hash")
+async def metricas_hash(pool_hash: PoolHash = Depends(obtener_pool_hash)):
+    return pool_hash.metricas()
+
+
 # ------------------------ ROOT ------------------------
-@app.get("/")
+@router.get("/")
 async def root():
     return {"status": "ok", "message": "Final Sentence Backend activo!"}
+
+
+@router.get("/listo")
+async def listo(request: Request):
+    # readiness: 503 hasta que MongoDB, catálogo y clasificaciones estén calientes
+    # (mientras tanto, `errores` dice qué falló en el último intento)
+    estado = request.app.state.arranque
+    return JSONResponse(estado, status_code=200 if estado["listo"] else 503)
+
+
+# ------------------------ CICLO DE VIDA ------------------------
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    inicio = time.perf_counter()
+    estado = app.state.arranque = {
+        "listo": False,
+        "presupuesto_s": ARRANQUE_PRESUPUESTO,
+        "imports_s": round(inicio - _INICIO_PROCESO, 3),
+        "hasta_servir_s": None,
+        "hasta_listo_s": None,
+        "intentos": 0,
+        "tiempos": {},
+        "errores": {},
+    }
+
+    # cada arranque arma lo suyo: nada compartido entre apps ni entre ciclos de vida
+    juego = app.state.juego = crear_juego()
+    pool_hash = app.state.pool_hash = PoolHash()
+
+    # lo local arranca ya; lo que depende de MongoDB se calienta en segundo plano
+    await juego.bus.iniciar()
+    juego.temporizadores.iniciar()
+    juego.persistencia.iniciar()
+
+    async def calentar():
+        espera = 1.0
+        while True:
+            tiempos, errores = await juego.calentar()
+            estado["intentos"] += 1
+            estado["tiempos"].update(tiempos)
+            estado["errores"] = errores
+            if not errores:
+                break
+            logging.warning(f"Arranque incompleto (intento {estado['intentos']}), "
+                            f"reintento en {espera:.0f}s: {errores}")
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, ARRANQUE_REINTENTO_MAX)
+
+        estado["hasta_listo_s"] = round(time.perf_counter() - _INICIO_PROCESO, 3)
+        estado["listo"] = True
+        if estado["hasta_listo_s"] > ARRANQUE_PRESUPUESTO:
+            logging.warning(f"Arranque fuera de presupuesto: {estado['hasta_listo_s']}s "
+                            f"(presupuesto {ARRANQUE_PRESUPUESTO}s) {estado['tiempos']}")
+        else:
+            logging.info(f"✔ Servidor listo en {estado['hasta_listo_s']}s {estado['tiempos']}")
+        # los refrescos periódicos empiezan con los datos ya cargados
+        juego.catalogo.iniciar()
+        juego.clasificaciones.iniciar()
+
+    tarea = asyncio.create_task(calentar())
+    estado["hasta_servir_s"] = round(time.perf_counter() - _INICIO_PROCESO, 3)
+
+    yield
+
+    tarea.cancel()
+    try:
+        await tarea
+    except asyncio.CancelledError:
+        pass
+    await juego.temporizadores.cerrar()
+    await juego.catalogo.cerrar()
+    await juego.clasificaciones.cerrar()
+    await juego.persistencia.cerrar()
+    await juego.transmisor.cerrar()
+    await juego.bus.cerrar()
+    await juego.base_datos.cerrar()
+    pool_hash.cerrar()
+
+
+# ------------------------ APP ------------------------
+def crear_app() -> FastAPI:
+    app = FastAPI(title="Final Sentence API", version="1.0.0", lifespan=ciclo_de_vida)
+
+    # ------------------------ CORS ------------------------
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(ws_router)
+    app.include_router(router)
+    return app
+
+
+app = crear_app()
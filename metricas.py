@@ -0,0 +1,38 @@
+# backend/metricas.py
+from collections import deque
+from typing import Deque, Dict
+
+
+class HistogramaLatencia:
+    """
+    Guarda las últimas N muestras (en segundos) y calcula percentiles.
+    Ventana acotada: memoria constante aunque el servidor lleve días arriba.
+    """
+
+    def __init__(self, max_muestras: int = 1024):
+        self._muestras: Deque[float] = deque(maxlen=max_muestras)
+        self.total = 0
+
+    def registrar(self, segundos: float):
+        self._muestras.append(segundos)
+        self.total += 1
+
+    def percentil(self, p: float) -> float:
+        return self._percentil(sorted(self._muestras), p)
+
+    @staticmethod
+    def _percentil(ordenadas, p: float) -> float:
+        if not ordenadas:
+            return 0.0
+        return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+    def resumen(self) -> Dict[str, float]:
+        ordenadas = sorted(self._muestras)
+        return {
+            "muestras": len(ordenadas),
+            "total": self.total,
+            "p50_ms": round(self._percentil(ordenadas, 50) * 1000, 3),
+            "p95_ms": round(self._percentil(ordenadas, 95) * 1000, 3),
+            "p99_ms": round(self._percentil(ordenadas, 99) * 1000, 3),
+            "max_ms": round(ordenadas[-1] * 1000, 3) if ordenadas else 0.0,
+        }
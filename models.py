@@ -18,6 +18,33 @@ class TipoSala(str, Enum):
     PRIVADA = "privada"
 
 
+def calcular_cambios(anterior: Any, actual: Any, prefijo: str = "") -> Dict[str, Any]:
+    """
+    Compara dos documentos (dicts de .dict()) y devuelve las rutas mínimas
+    para un $set, p.ej. {"jugadores.3.errores": 2, "estado": "jugando"}.
+    Si una lista cambió de largo se reemplaza entera.
+    """
+    def ruta(clave) -> str:
+        return f"{prefijo}.{clave}" if prefijo else str(clave)
+
+    if isinstance(anterior, dict) and isinstance(actual, dict):
+        cambios: Dict[str, Any] = {}
+        for clave, valor in actual.items():
+            if clave not in anterior:
+                cambios[ruta(clave)] = valor
+            else:
+                cambios.update(calcular_cambios(anterior[clave], valor, ruta(clave)))
+        return cambios
+
+    if isinstance(anterior, list) and isinstance(actual, list) and len(anterior) == len(actual):
+        cambios = {}
+        for i, (viejo, nuevo) in enumerate(zip(anterior, actual)):
+            cambios.update(calcular_cambios(viejo, nuevo, ruta(i)))
+        return cambios
+
+    return {} if anterior == actual else {prefijo: actual}
+
+
 class Jugador(BaseModel):
     id: str
     nombre: str
@@ -49,6 +76,8 @@ class Sala(BaseModel):
     frase_actual: Optional[Frase] = None
     tiempo_inicio: Optional[datetime] = None
     tiempo_limite: int = 45
+    dificultad: Optional[str] = None    # None = cualquiera
+    categoria: Optional[str] = None
 
 
 class Partida(BaseModel):
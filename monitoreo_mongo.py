@@ -0,0 +1,134 @@
+# backend/monitoreo_mongo.py
+import threading
+from typing import Dict
+
+from pymongo import monitoring
+
+from metricas import HistogramaLatencia
+
+
+class MonitorComandos(monitoring.CommandListener):
+    """Latencia por comando (find, update, insert, ...) medida por el driver."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencias: Dict[str, HistogramaLatencia] = {}
+        self._fallos: Dict[str, int] = {}
+
+    def _histograma(self, comando: str) -> HistogramaLatencia:
+        with self._lock:
+            h = self._latencias.get(comando)
+            if h is None:
+                h = self._latencias[comando] = HistogramaLatencia(max_muestras=512)
+            return h
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._histograma(event.command_name).registrar(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self._histograma(event.command_name).registrar(event.duration_micros / 1e6)
+        with self._lock:
+            self._fallos[event.command_name] = self._fallos.get(event.command_name, 0) + 1
+
+    def metricas(self) -> dict:
+        with self._lock:
+            latencias = dict(self._latencias)
+            fallos = dict(self._fallos)
+        return {
+            comando: {**h.resumen(), "fallos": fallos.get(comando, 0)}
+            for comando, h in sorted(latencias.items())
+        }
+
+
+class MonitorPool(monitoring.ConnectionPoolListener):
+    """
+    Estado del pool de conexiones: cuántas hay, cuántas en uso, cuánto se
+    espera para sacar una y por qué falla. Espera alta con pocas en uso
+    apunta a selección de servidor; con el pool lleno, a falta de conexiones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.espera = HistogramaLatencia()
+        self.abiertas = 0
+        self.en_uso = 0
+        self.max_en_uso = 0
+        self.creadas = 0
+        self.limpiezas = 0
+        self.fallos_checkout: Dict[str, int] = {}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.limpiezas += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.abiertas += 1
+            self.creadas += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.abiertas -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def _registrar_espera(self, event):
+        # `duration` existe desde pymongo 4.7; antes no hay espera que medir
+        duracion = getattr(event, "duration", None)
+        if duracion is not None:
+            self.espera.registrar(duracion)
+
+    def connection_check_out_failed(self, event):
+        self._registrar_espera(event)
+        with self._lock:
+            self.fallos_checkout[event.reason] = self.fallos_checkout.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        self._registrar_espera(event)
+        with self._lock:
+            self.en_uso += 1
+            self.max_en_uso = max(self.max_en_uso, self.en_uso)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.en_uso -= 1
+
+    def metricas(self) -> dict:
+        return {
+            "abiertas": self.abiertas,
+            "en_uso": self.en_uso,
+            "max_en_uso": self.max_en_uso,
+            "creadas": self.creadas,
+            "limpiezas": self.limpiezas,
+            "fallos_checkout": dict(self.fallos_checkout),
+            "espera_checkout": self.espera.resumen(),
+        }
+
+
+class MonitorMongo:
+    def __init__(self):
+        self.comandos = MonitorComandos()
+        self.pool = MonitorPool()
+
+    @property
+    def listeners(self):
+        return [self.comandos, self.pool]
+
+    def metricas(self) -> dict:
+        return {"pool": self.pool.metricas(), "comandos": self.comandos.metricas()}
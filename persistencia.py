@@ -0,0 +1,132 @@
+# backend/persistencia.py
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from config import PERSISTENCIA_INTERVALO
+from models import Sala, calcular_cambios
+
+
+class BufferEscritura:
+    """
+    Write-behind para el estado de las salas.
+    Las jugadas solo marcan la sala como sucia; cada `intervalo` segundos se
+    hace UNA escritura por sala sucia, sin importar cuántos cambios hubo.
+    Las transiciones críticas (inicio/fin de partida) llaman a vaciar_sala().
+    Solo se escriben las rutas que cambiaron desde la última escritura.
+    """
+
+    def __init__(self, base_datos, intervalo: float = PERSISTENCIA_INTERVALO):
+        self.base_datos = base_datos
+        self.intervalo = intervalo
+
+        self._sucias: Dict[str, Sala] = {}
+        # última versión escrita de cada sala, base para calcular el delta
+        self._persistidas: Dict[str, Dict[str, Any]] = {}
+        # una escritura por sala a la vez: el delta se calcula contra lo ya confirmado
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tarea: Optional[asyncio.Task] = None
+        self._cerrando = False
+
+        self.marcas = 0
+        self.escrituras = 0
+        self.fallos = 0
+        self.campos_escritos = 0
+
+    # ======================================================
+    # ================   MARCAR   ==========================
+    # ======================================================
+    def marcar(self, sala: Sala):
+        self.marcas += 1
+        self._sucias[sala.id] = sala
+        self.iniciar()
+
+    def registrar_persistida(self, sala: Sala):
+        self._persistidas[sala.id] = sala.dict()
+
+    def descartar(self, sala_id: str):
+        self._sucias.pop(sala_id, None)
+        self._persistidas.pop(sala_id, None)
+        self._locks.pop(sala_id, None)
+
+    # ======================================================
+    # ================   VACIADO   =========================
+    # ======================================================
+    async def vaciar_sala(self, sala_id: str):
+        sala = self._sucias.pop(sala_id, None)
+        if sala:
+            await self._escribir(sala)
+
+    async def vaciar(self):
+        if not self._sucias:
+            return
+        salas = list(self._sucias.values())
+        self._sucias.clear()
+        await asyncio.gather(*(self._escribir(s) for s in salas))
+
+    async def _escribir(self, sala: Sala):
+        # si ya hay una escritura de esta sala en vuelo (ciclo vs vaciar_sala), se espera
+        # a que termine: así nunca llegan dos deltas de la misma base en cualquier orden
+        lock = self._locks.setdefault(sala.id, asyncio.Lock())
+        async with lock:
+            await self._escribir_serializado(sala)
+
+    async def _escribir_serializado(self, sala: Sala):
+        # la instantánea se toma en el loop: el hilo de Mongo no ve la sala a medio modificar
+        actual = sala.dict()
+        anterior = self._persistidas.get(sala.id)
+        cambios = calcular_cambios(anterior, actual) if anterior is not None else actual
+        if not cambios:
+            return
+
+        try:
+            await self.base_datos.actualizar_sala_parcial(sala.id, cambios)
+            self._persistidas[sala.id] = actual
+            self.escrituras += 1
+            self.campos_escritos += len(cambios)
+        except Exception as e:
+            self.fallos += 1
+            logging.error(f"No se pudo persistir sala {sala.id}: {e}")
+            # se reintenta en el próximo ciclo (salvo que ya se haya vuelto a marcar)
+            if not self._cerrando:
+                self._sucias.setdefault(sala.id, sala)
+
+    async def _ciclo(self):
+        while not self._cerrando:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.vaciar()
+            except Exception as e:
+                logging.error(f"Error vaciando buffer de escritura: {e}")
+
+    # ======================================================
+    # ================   CICLO DE VIDA   ===================
+    # ======================================================
+    def iniciar(self):
+        if self._cerrando:
+            return
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.create_task(self._ciclo())
+
+    async def cerrar(self):
+        self._cerrando = True
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.vaciar()
+        logging.info(f"Buffer de escritura vaciado ({self.escrituras} escrituras, {self.marcas} marcas)")
+
+    def metricas(self) -> dict:
+        return {
+            "intervalo": self.intervalo,
+            "sucias": len(self._sucias),
+            "marcas": self.marcas,
+            "escrituras": self.escrituras,
+            "fusionadas": max(0, self.marcas - self.escrituras - len(self._sucias)),
+            "fallos": self.fallos,
+            "campos_escritos": self.campos_escritos,
+        }
@@ -0,0 +1,22 @@
+# backend/reconstruir_estadisticas.py
+"""
+Reconstruye la colección `estadisticas` a partir de todas las partidas.
+
+Hace falta una vez al desplegar (las partidas viejas no pasaron por el
+acumulado incremental) o si alguna vez se desincroniza. Es idempotente.
+Conviene correrlo sin partidas en curso: lo que termine mientras tanto
+puede quedar pisado por el recálculo.
+
+Uso:
+    python reconstruir_estadisticas.py
+"""
+import time
+
+from database import BaseDatos
+
+
+if __name__ == "__main__":
+    db = BaseDatos()
+    inicio = time.perf_counter()
+    total = db.reconstruir_estadisticas()
+    print(f"✔ Estadísticas reconstruidas para {total} jugadores en {time.perf_counter() - inicio:.1f}s")
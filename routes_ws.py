@@ -1,26 +1,95 @@
 # backend/routes_ws.py
+import logging
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import asyncio
 from models import MensajeWebSocket
-from game_controller import juego  # instancia única
+from game_controller import obtener_juego
 
 router = APIRouter()
 
 @router.websocket("/ws/{sala_id}/{jugador_id}")
 async def ws_sala(websocket: WebSocket, sala_id: str, jugador_id: str):
     await websocket.accept()
-    admin = juego  # alias
-
-    # registrar la conexión (lista de websockets por sala)
-    admin.conexiones.setdefault(sala_id, [])
-    admin.conexiones[sala_id].append(websocket)
+    admin = obtener_juego(websocket)  # el de esta app
 
-    # asegurar sala en memoria (si existe en BD)
+    # asegurar sala en memoria (si existe en BD); sin sala no hay actor ni conexión
+    if sala_id not in admin.salas_activas:
+        try:
+            await admin.cargar_sala_desde_bd(sala_id)
+        except Exception as e:
+            logging.error(f"[WS] No se pudo cargar la sala {sala_id}: {e}")
     if sala_id not in admin.salas_activas:
-        admin.cargar_sala_desde_bd(sala_id)
+        await websocket.close(code=4404)
+        return
+
+    # registrar la conexión (cola de salida propia por socket)
+    admin.registrar_conexion(sala_id, websocket)
+
+    # todos los eventos de la sala pasan por su actor: en orden y sin intercalarse
+    async def al_conectar():
+        # enviar estado inicial
+        await admin.enviar_estado_sala(sala_id)
+
+    async def manejar(mensaje: MensajeWebSocket):
+        # manejar tipos básicos
+        if mensaje.tipo == "join":
+            # agrega/reconecta al jugador en memoria
+            await admin.unir_sala_ws(mensaje.jugador_id, sala_id)
+            await admin.enviar_estado_sala(sala_id)
+
+        elif mensaje.tipo == "reconnect":
+            admin.reconectar_jugador(mensaje.jugador_id, sala_id)
+            await admin.enviar_estado_sala(sala_id)
+
+        elif mensaje.tipo == "iniciar_partida" or mensaje.tipo == "start_game":
+            await admin.iniciar_partida(sala_id)
+            # enviar estado actualizado ya lo hace iniciar_partida
+
+        elif mensaje.tipo == "escritura":
+            texto = mensaje.datos.get("texto", "")
+            tiempo = mensaje.datos.get("tiempo_tomado", 45)
+            if not isinstance(texto, str) or not _es_numero(tiempo):
+                logging.debug(f"[WS] Escritura mal formada de {mensaje.jugador_id} en sala {sala_id}, ignorada")
+                return
+            await admin.procesar_escritura(mensaje.jugador_id, sala_id, texto, float(tiempo))
+
+        elif mensaje.tipo == "escritura_delta":
+            # modo streaming: solo los caracteres nuevos y desde dónde empiezan
+            agregado = mensaje.datos.get("agregado", "")
+            cursor = mensaje.datos.get("cursor", 0)
+            if not isinstance(agregado, str) or not _es_entero(cursor) or cursor < 0:
+                logging.debug(f"[WS] Delta mal formado de {mensaje.jugador_id} en sala {sala_id}, ignorado")
+                return
+            await admin.procesar_escritura_delta(mensaje.jugador_id, sala_id, agregado, cursor)
+
+        elif mensaje.tipo == "abandonar":
+            await admin.abandonar_sala(mensaje.jugador_id, sala_id)
+            await admin.enviar_estado_sala(sala_id)
+
+        elif mensaje.tipo == "ping":
+            # opcional: no hacemos nada, solo mantener conector vivo
+            return
+
+        # auto-start si quedó llena (en el mismo evento: nadie entra en medio)
+        sala = admin.obtener_sala(sala_id)
+        if sala and sala.max_jugadores and len(sala.jugadores) == sala.max_jugadores and sala.estado != "jugando":
+            await admin.iniciar_partida(sala_id)
+
+    async def al_desconectar():
+        # marcar jugador desconectado temporalmente (no eliminar inmediatamente)
+        sala = admin.obtener_sala(sala_id)
+        if sala:
+            jugador = admin.buscar_jugador(sala, jugador_id)
+            if jugador:
+                jugador.conectado = False
+            admin.sala_modificada(sala)
+
+            await admin.enviar_estado_sala(sala_id)
+
+            # esperar ventana para reconexión (25s)
+            admin.programar_remocion(jugador_id, sala_id, 25)
 
-    # enviar estado inicial (si hay sala)
-    await admin.enviar_estado_sala(sala_id)
+    await admin.en_sala(sala_id, al_conectar)
 
     try:
         while True:
@@ -30,80 +99,31 @@ async def ws_sala(websocket: WebSocket, sala_id: str, jugador_id: str):
             try:
                 mensaje = MensajeWebSocket(**datos)
             except Exception:
-                tipo = datos.get("tipo")
-                datos_payload = datos.get("datos", {})
-                jugador_payload = datos.get("jugador_id", jugador_id)
-                mensaje = MensajeWebSocket(tipo=tipo, datos=datos_payload, jugador_id=jugador_payload)
-
-            # manejar tipos básicos
-            if mensaje.tipo == "join":
-                # agrega/reconecta al jugador en memoria
-                admin.unir_sala_ws(mensaje.jugador_id, sala_id)
-                await admin.enviar_estado_sala(sala_id)
-
-            elif mensaje.tipo == "reconnect":
-                admin.reconectar_jugador(mensaje.jugador_id, sala_id)
-                await admin.enviar_estado_sala(sala_id)
-
-            elif mensaje.tipo == "iniciar_partida" or mensaje.tipo == "start_game":
-                await admin.iniciar_partida(sala_id)
-                # enviar estado actualizado ya lo hace iniciar_partida
-
-            elif mensaje.tipo == "escritura":
-                texto = mensaje.datos.get("texto", "")
-                tiempo = mensaje.datos.get("tiempo_tomado", 45)
-                await admin.procesar_escritura(mensaje.jugador_id, sala_id, texto, tiempo)
-
-            elif mensaje.tipo == "abandonar":
-                admin.abandonar_sala(mensaje.jugador_id, sala_id)
-                await admin.enviar_estado_sala(sala_id)
-
-            elif mensaje.tipo == "ping":
-                # opcional: no hacemos nada, solo mantener conector vivo
-                pass
-
-            # auto-start si quedó llena
-            sala = admin.obtener_sala(sala_id)
-            if sala and sala.max_jugadores and len(sala.jugadores) == sala.max_jugadores and sala.estado != "jugando":
-                await admin.iniciar_partida(sala_id)
+                try:
+                    tipo = datos.get("tipo")
+                    datos_payload = datos.get("datos", {})
+                    jugador_payload = datos.get("jugador_id", jugador_id)
+                    mensaje = MensajeWebSocket(tipo=tipo, datos=datos_payload, jugador_id=jugador_payload)
+                except Exception:
+                    logging.debug(f"[WS] Mensaje inválido en sala {sala_id}, ignorado")
+                    continue
+
+            await admin.en_sala(sala_id, manejar, mensaje)
 
     except WebSocketDisconnect:
-        # quitar socket de la lista y marcar desconexión con ventana de reconexión
-        try:
-            admin.conexiones[sala_id].remove(websocket)
-        except Exception:
-            pass
+        pass
 
-        # marcar jugador desconectado temporalmente (no eliminar inmediatamente)
-        sala = admin.obtener_sala(sala_id)
-        if sala:
-            for j in sala.jugadores:
-                if j.id == jugador_id:
-                    try:
-                        j.conectado = False
-                    except Exception:
-                        pass
-                    break
-            try:
-                admin.base_datos.actualizar_sala(sala)
-            except Exception:
-                pass
+    finally:
+        # pase lo que pase (desconexión o error): quitar socket de la lista
+        # y marcar desconexión con ventana de reconexión
+        admin.quitar_conexion(sala_id, websocket)
+        await admin.en_sala(sala_id, al_desconectar)
 
-            await admin.enviar_estado_sala(sala_id)
 
-            # esperar ventana para reconexión (25s)
-            async def remover_si_no_reconecta():
-                await asyncio.sleep(25)
-                sala_now = admin.obtener_sala(sala_id)
-                if not sala_now:
-                    return
-                jugador_presente = next((x for x in sala_now.jugadores if x.id == jugador_id), None)
-                if jugador_presente and not getattr(jugador_presente, "conectado", True):
-                    admin.abandonar_sala(jugador_id, sala_id)
-                    try:
-                        await admin.enviar_estado_sala(sala_id)
-                    except Exception:
-                        pass
-
-            asyncio.create_task(remover_si_no_reconecta())
+def _es_entero(valor) -> bool:
+    # bool es subclase de int, pero true/false no es un cursor
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
 
+def _es_numero(valor) -> bool:
+    return _es_entero(valor) or isinstance(valor, float)
@@ -0,0 +1,83 @@
+# backend/seguridad.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from config import HASH_HILOS, HASH_MAX_CONCURRENCIA, HASH_MAX_EN_COLA
+from metricas import HistogramaLatencia
+
+
+class PoolHashSaturado(Exception):
+    pass
+
+
+class PoolHash:
+    """
+    bcrypt tarda ~250 ms por hash: se corre en un pool de hilos propio con
+    límite de concurrencia, para que un pico de logins no congele el loop
+    (ni las partidas en curso). Si la cola se llena se rechaza de inmediato.
+    """
+
+    def __init__(self, hilos: int = HASH_HILOS,
+                 max_concurrencia: int = HASH_MAX_CONCURRENCIA,
+                 max_en_cola: int = HASH_MAX_EN_COLA):
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="bcrypt")
+        self._semaforo = asyncio.Semaphore(max_concurrencia)
+        self.max_en_cola = max_en_cola
+
+        self.en_cola = 0
+        self.en_curso = 0
+        self.rechazados = 0
+        self._espera = HistogramaLatencia()
+        self._duracion = HistogramaLatencia()
+
+    async def _ejecutar(self, funcion, *args):
+        if self.en_cola >= self.max_en_cola:
+            self.rechazados += 1
+            raise PoolHashSaturado("Demasiadas solicitudes de autenticación, intenta de nuevo")
+
+        encolado = time.perf_counter()
+        self.en_cola += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self.en_cola -= 1
+
+        inicio = time.perf_counter()
+        self._espera.registrar(inicio - encolado)
+        self.en_curso += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, funcion, *args)
+        finally:
+            self.en_curso -= 1
+            self._semaforo.release()
+            self._duracion.registrar(time.perf_counter() - inicio)
+
+    async def hashear(self, password: str) -> str:
+        return await self._ejecutar(_hashear, password)
+
+    async def verificar(self, password: str, password_hash: str) -> bool:
+        return await self._ejecutar(_verificar, password, password_hash)
+
+    def cerrar(self):
+        self._executor.shutdown(wait=False)
+
+    def metricas(self) -> dict:
+        return {
+            "en_cola": self.en_cola,
+            "en_curso": self.en_curso,
+            "rechazados": self.rechazados,
+            "espera_cola": self._espera.resumen(),
+            "duracion_hash": self._duracion.resumen(),
+        }
+
+
+def _hashear(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+
+def _verificar(password: str, password_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode(), password_hash.encode())
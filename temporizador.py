@@ -0,0 +1,159 @@
+# backend/temporizador.py
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from config import TEMPORIZADOR_RESOLUCION
+
+
+class Temporizador:
+    __slots__ = ("vence", "callback", "args", "tipo", "cancelado", "_cubeta", "_rueda")
+
+    def __init__(self, rueda: "RuedaTemporizadores", vence: int, callback: Callable, args: Tuple, tipo: str):
+        self.vence = vence
+        self.callback = callback
+        self.args = args
+        self.tipo = tipo
+        self.cancelado = False
+        self._cubeta: Optional[Set["Temporizador"]] = None
+        self._rueda = rueda
+
+    def cancelar(self):
+        if self.cancelado:
+            return
+        self.cancelado = True
+        if self._cubeta is not None:
+            self._cubeta.discard(self)
+            self._cubeta = None
+            self._rueda._descontar(self.tipo)
+
+
+class RuedaTemporizadores:
+    """
+    Rueda de temporizadores jerárquica: un solo ciclo para todos los plazos del
+    juego (fin de ronda, ventana de reconexión, limpieza de salas) en vez de
+    una tarea con asyncio.sleep por cada uno. Programar y cancelar son O(1).
+
+    Nivel 0: `niveles[0]` cubetas de `resolucion` segundos; cada nivel siguiente
+    cubre una vuelta entera del anterior por cubeta. Cuando un nivel da la
+    vuelta, la cubeta que toca del nivel de arriba se redistribuye hacia abajo.
+    """
+
+    def __init__(self, resolucion: float = TEMPORIZADOR_RESOLUCION, niveles: Tuple[int, ...] = (256, 64, 64)):
+        self.resolucion = resolucion
+        self.niveles = niveles
+        self._granos: List[int] = []
+        grano = 1
+        for cubetas in niveles:
+            self._granos.append(grano)
+            grano *= cubetas
+
+        self._ruedas: List[List[Set[Temporizador]]] = [[set() for _ in range(n)] for n in niveles]
+        self._tick = 0
+        self._pendientes: Dict[str, int] = {}
+        self._tarea: Optional[asyncio.Task] = None
+
+        self.disparados = 0
+
+    # ======================================================
+    # ================   PROGRAMAR   =======================
+    # ======================================================
+    def programar(self, segundos: float, callback: Callable, *args, tipo: str = "general") -> Temporizador:
+        ticks = max(1, int(round(segundos / self.resolucion)))
+        t = Temporizador(self, self._tick + ticks, callback, args, tipo)
+        self._insertar(t)
+        self._pendientes[tipo] = self._pendientes.get(tipo, 0) + 1
+        self.iniciar()
+        return t
+
+    def _insertar(self, t: Temporizador):
+        vence = max(t.vence, self._tick)
+        delta = vence - self._tick
+
+        nivel = len(self.niveles) - 1
+        for n, cubetas in enumerate(self.niveles):
+            if delta < self._granos[n] * cubetas:
+                nivel = n
+                break
+
+        cubeta = self._ruedas[nivel][(vence // self._granos[nivel]) % self.niveles[nivel]]
+        cubeta.add(t)
+        t._cubeta = cubeta
+
+    def _descontar(self, tipo: str):
+        self._pendientes[tipo] = self._pendientes.get(tipo, 1) - 1
+
+    # ======================================================
+    # ================   AVANCE   ==========================
+    # ======================================================
+    def _avanzar(self):
+        self._tick += 1
+
+        # al completar una vuelta de un nivel, se baja la cubeta que toca del de arriba
+        for nivel in range(1, len(self.niveles)):
+            if self._tick % self._granos[nivel] != 0:
+                break
+            idx = (self._tick // self._granos[nivel]) % self.niveles[nivel]
+            cubeta = self._ruedas[nivel][idx]
+            self._ruedas[nivel][idx] = set()
+            for t in cubeta:
+                self._insertar(t)
+
+        idx = self._tick % self.niveles[0]
+        vencidos = self._ruedas[0][idx]
+        self._ruedas[0][idx] = set()
+        for t in vencidos:
+            if t.vence > self._tick:
+                # más allá del alcance de la rueda: sigue dando vueltas
+                self._insertar(t)
+                continue
+            t._cubeta = None
+            self._descontar(t.tipo)
+            self._disparar(t)
+
+    def _disparar(self, t: Temporizador):
+        self.disparados += 1
+        try:
+            resultado = t.callback(*t.args)
+            if asyncio.iscoroutine(resultado):
+                asyncio.create_task(resultado)
+        except Exception as e:
+            logging.error(f"Error en temporizador {t.tipo}: {e}")
+
+    async def _ciclo(self):
+        loop = asyncio.get_running_loop()
+        inicio = loop.time() - self._tick * self.resolucion
+        while True:
+            await asyncio.sleep(self.resolucion)
+            # si el loop se atrasó, se ponen al día todos los ticks perdidos
+            objetivo = int((loop.time() - inicio) / self.resolucion)
+            while self._tick < objetivo:
+                self._avanzar()
+
+    # ======================================================
+    # ================   CICLO DE VIDA   ===================
+    # ======================================================
+    def iniciar(self):
+        if self._tarea is None or self._tarea.done():
+            try:
+                self._tarea = asyncio.get_running_loop().create_task(self._ciclo())
+            except RuntimeError:
+                # sin loop todavía: arranca con el primer programar() dentro del loop
+                pass
+
+    async def cerrar(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+    def metricas(self) -> dict:
+        return {
+            "pendientes": sum(self._pendientes.values()),
+            "por_tipo": dict(self._pendientes),
+            "disparados": self.disparados,
+            "resolucion": self.resolucion,
+        }
@@ -0,0 +1,349 @@
+# backend/transmision.py
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from config import WS_TIMEOUT_ENVIO, WS_MAX_TIMEOUTS, WS_MAX_COLA, WS_POLITICAS_DESBORDE, TICK_HZ
+from metricas import HistogramaLatencia
+from bus_salas import BusSalas, BusLocal
+
+# Clases de mensaje según lo que se puede perder si el cliente va lento
+CLASE_NORMAL = "normal"
+CLASE_PROGRESO = "progreso"   # se puede descartar: llega otro enseguida
+CLASE_ESTADO = "estado"       # foto completa: solo importa la última
+
+TIPOS_PROGRESO = {"jugador_progreso"}
+TIPOS_ESTADO = {"estado_sala"}
+
+# en modo tick estos no esperan al siguiente tick
+TIPOS_CRITICOS = {"partida_iniciada", "partida_finalizada", "sala_eliminada", "error"}
+TICK_HZ_MIN, TICK_HZ_MAX = 10.0, 30.0
+
+POLITICA_DESCARTAR_PROGRESO = "descartar_progreso"
+POLITICA_COALESCER_ESTADO = "coalescer_estado"
+POLITICA_DESCONECTAR = "desconectar"
+
+
+def clasificar_mensaje(mensaje: dict) -> str:
+    tipo = mensaje.get("tipo")
+    if tipo in TIPOS_PROGRESO:
+        return CLASE_PROGRESO
+    if tipo in TIPOS_ESTADO:
+        return CLASE_ESTADO
+    return CLASE_NORMAL
+
+
+class ConexionSala:
+    """
+    Un WebSocket registrado en una sala, con su propia cola acotada y una
+    tarea escritora. Quien transmite solo encola; nunca espera a la red.
+    """
+
+    def __init__(self, transmisor: "TransmisorSalas", sala_id: str, ws: WebSocket):
+        self.transmisor = transmisor
+        self.sala_id = sala_id
+        self.ws = ws
+
+        self._cola: Deque[Tuple[str, str, float]] = deque()
+        self._hay_mensajes = asyncio.Event()
+        self._timeouts_seguidos = 0
+        self.cerrada = False
+        self.descartados = 0
+        self.coalescidos = 0
+
+        self._tarea = asyncio.create_task(self._escritor())
+
+    # ======================================================
+    # ================   COLA   ============================
+    # ======================================================
+    def encolar(self, texto: str, clase: str = CLASE_NORMAL):
+        if self.cerrada:
+            return
+
+        ahora = time.perf_counter()
+
+        # una foto de estado pendiente se reemplaza por la nueva
+        if clase == CLASE_ESTADO:
+            for i, (clase_pend, _, t_pend) in enumerate(self._cola):
+                if clase_pend == CLASE_ESTADO:
+                    self._cola[i] = (clase, texto, t_pend)
+                    self.coalescidos += 1
+                    return
+
+        if len(self._cola) >= self.transmisor.max_cola and not self._hacer_lugar(clase):
+            logging.warning(f"Cola de salida llena en sala {self.sala_id}, desconectando cliente")
+            self.transmisor.expulsar(self)
+            return
+
+        self._cola.append((clase, texto, ahora))
+        self._hay_mensajes.set()
+
+    def _hacer_lugar(self, clase: str) -> bool:
+        for politica in self.transmisor.politicas:
+            if politica == POLITICA_DESCARTAR_PROGRESO:
+                if self._descartar_primero(CLASE_PROGRESO):
+                    return True
+            elif politica == POLITICA_COALESCER_ESTADO:
+                if self._descartar_primero(CLASE_ESTADO):
+                    return True
+            elif politica == POLITICA_DESCONECTAR:
+                return False
+        return False
+
+    def _descartar_primero(self, clase: str) -> bool:
+        for i, (clase_pend, _, _) in enumerate(self._cola):
+            if clase_pend == clase:
+                del self._cola[i]
+                self.descartados += 1
+                return True
+        return False
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._cola)
+
+    # ======================================================
+    # ================   ESCRITOR   ========================
+    # ======================================================
+    async def _escritor(self):
+        try:
+            while not self.cerrada:
+                if not self._cola:
+                    self._hay_mensajes.clear()
+                    await self._hay_mensajes.wait()
+                    continue
+
+                _, texto, encolado = self._cola.popleft()
+                try:
+                    await asyncio.wait_for(self.ws.send_text(texto), timeout=self.transmisor.timeout_envio)
+                    self._timeouts_seguidos = 0
+                    self.transmisor.registrar_latencia(self.sala_id, time.perf_counter() - encolado)
+                except asyncio.TimeoutError:
+                    self._timeouts_seguidos += 1
+                    logging.warning(
+                        f"Timeout enviando WS en sala {self.sala_id} "
+                        f"({self._timeouts_seguidos}/{self.transmisor.max_timeouts})"
+                    )
+                    if self._timeouts_seguidos >= self.transmisor.max_timeouts:
+                        self.transmisor.expulsar(self)
+                except Exception as e:
+                    logging.warning(f"Fallo al enviar WS: {e}")
+                    self.transmisor.quitar(self)
+        except asyncio.CancelledError:
+            pass
+
+    def detener(self):
+        self.cerrada = True
+        self._cola.clear()
+        self._hay_mensajes.set()
+        if self._tarea is not asyncio.current_task():
+            self._tarea.cancel()
+
+    async def cerrar(self, code: int = 1000):
+        self.detener()
+        try:
+            await asyncio.wait_for(self.ws.close(code=code), timeout=self.transmisor.timeout_envio)
+        except Exception:
+            pass
+
+
+class BufferTick:
+    """
+    Eventos de una sala acumulados durante un tick. Del progreso de cada
+    jugador y de la foto de la sala solo queda el último; el resto va en orden.
+    """
+
+    __slots__ = ("eventos", "_posiciones", "recibidos")
+
+    def __init__(self):
+        self.eventos: List[Optional[dict]] = []
+        self._posiciones: Dict[Tuple[str, Optional[str]], int] = {}
+        self.recibidos = 0
+
+    def agregar(self, mensaje: dict):
+        self.recibidos += 1
+        tipo = mensaje.get("tipo")
+        clave = None
+        if tipo in TIPOS_PROGRESO:
+            clave = (tipo, mensaje.get("jugador_id"))
+        elif tipo in TIPOS_ESTADO:
+            clave = (tipo, None)
+
+        if clave is not None:
+            anterior = self._posiciones.get(clave)
+            if anterior is not None:
+                self.eventos[anterior] = None
+            self._posiciones[clave] = len(self.eventos)
+        self.eventos.append(mensaje)
+
+    def mensaje(self, tick: int) -> Tuple[dict, str]:
+        eventos = [e for e in self.eventos if e is not None]
+        clases = {clasificar_mensaje(e) for e in eventos}
+        # si todo es descartable, el agregado también lo es
+        clase = clases.pop() if len(clases) == 1 else CLASE_NORMAL
+        return {"tipo": "actualizacion", "tick": tick, "eventos": eventos}, clase
+
+
+class TransmisorSalas:
+    """
+    Reparte mensajes a las conexiones de una sala.
+    El mensaje se serializa una sola vez y se encola en cada conexión;
+    cada escritor envía con su propio timeout y los sockets trabados se expulsan.
+    """
+
+    def __init__(self, conexiones: Dict[str, List[ConexionSala]],
+                 timeout_envio: float = WS_TIMEOUT_ENVIO,
+                 max_timeouts: int = WS_MAX_TIMEOUTS,
+                 max_cola: int = WS_MAX_COLA,
+                 politicas: Optional[List[str]] = None,
+                 bus: Optional[BusSalas] = None,
+                 tick_hz: float = TICK_HZ):
+        self.conexiones = conexiones
+        self.timeout_envio = timeout_envio
+        self.max_timeouts = max_timeouts
+        self.max_cola = max_cola
+        self.politicas = politicas if politicas is not None else WS_POLITICAS_DESBORDE
+
+        self._latencias: Dict[str, HistogramaLatencia] = {}
+        self.expulsados = 0
+
+        # el bus reparte a todos los workers; cada uno entrega a sus sockets
+        self.bus = bus or BusLocal()
+        self.bus.conectar(self.entregar_local)
+
+        # modo tick: un mensaje agregado por sala y por tick
+        self.tick_hz = min(max(tick_hz, TICK_HZ_MIN), TICK_HZ_MAX) if tick_hz > 0 else 0.0
+        self._buffers: Dict[str, BufferTick] = {}
+        self._tarea_tick: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.eventos_agregados = 0
+        self.mensajes_agregados = 0
+        self._duracion_tick = HistogramaLatencia()
+
+    # ======================================================
+    # ================   CONEXIONES   ======================
+    # ======================================================
+    def registrar(self, sala_id: str, ws: WebSocket) -> ConexionSala:
+        conexion = ConexionSala(self, sala_id, ws)
+        self.conexiones.setdefault(sala_id, []).append(conexion)
+        return conexion
+
+    def buscar(self, sala_id: str, ws: WebSocket) -> Optional[ConexionSala]:
+        return next((c for c in self.conexiones.get(sala_id, []) if c.ws is ws), None)
+
+    def quitar(self, conexion: ConexionSala) -> bool:
+        conexion.detener()
+        try:
+            self.conexiones.get(conexion.sala_id, []).remove(conexion)
+            return True
+        except ValueError:
+            return False
+
+    def expulsar(self, conexion: ConexionSala):
+        if not self.quitar(conexion):
+            return
+        self.expulsados += 1
+        logging.warning(f"Socket expulsado de sala {conexion.sala_id}")
+        asyncio.create_task(conexion.cerrar(code=1011))
+
+    # ======================================================
+    # ================   ENVÍO   ===========================
+    # ======================================================
+    async def transmitir(self, sala_id: str, mensaje: dict):
+        self.encolar(sala_id, mensaje)
+
+    def encolar(self, sala_id: str, mensaje: dict):
+        if self.tick_hz:
+            if mensaje.get("tipo") not in TIPOS_CRITICOS:
+                self._buffers.setdefault(sala_id, BufferTick()).agregar(mensaje)
+                self._asegurar_tick()
+                return
+            # lo acumulado sale antes, para no alterar el orden
+            self._vaciar_sala(sala_id)
+        self._publicar(sala_id, mensaje, clasificar_mensaje(mensaje))
+
+    def _publicar(self, sala_id: str, mensaje: dict, clase: str):
+        texto = json.dumps(mensaje, default=str)
+        self.bus.publicar(sala_id, texto, clase)
+
+    def entregar_local(self, sala_id: str, texto: str, clase: str):
+        for conexion in list(self.conexiones.get(sala_id, [])):
+            conexion.encolar(texto, clase)
+
+    def olvidar_sala(self, sala_id: str):
+        self._latencias.pop(sala_id, None)
+        self._buffers.pop(sala_id, None)
+
+    # ======================================================
+    # ================   MODO TICK   =======================
+    # ======================================================
+    def _vaciar_sala(self, sala_id: str):
+        buffer = self._buffers.pop(sala_id, None)
+        if buffer is None:
+            return
+        mensaje, clase = buffer.mensaje(self.ticks)
+        self.eventos_agregados += buffer.recibidos
+        self.mensajes_agregados += 1
+        self._publicar(sala_id, mensaje, clase)
+
+    def _asegurar_tick(self):
+        if self._tarea_tick is None or self._tarea_tick.done():
+            self._tarea_tick = asyncio.create_task(self._ciclo_tick())
+
+    async def _ciclo_tick(self):
+        loop = asyncio.get_running_loop()
+        periodo = 1.0 / self.tick_hz
+        siguiente = loop.time()
+        while True:
+            siguiente += periodo
+            await asyncio.sleep(max(0.0, siguiente - loop.time()))
+            self.ticks += 1
+            inicio = time.perf_counter()
+            for sala_id in list(self._buffers):
+                try:
+                    self._vaciar_sala(sala_id)
+                except Exception as e:
+                    logging.error(f"Error enviando tick de sala {sala_id}: {e}")
+            self._duracion_tick.registrar(time.perf_counter() - inicio)
+            # si el loop se atrasó, no se intenta recuperar los ticks perdidos
+            siguiente = max(siguiente, loop.time())
+
+    async def cerrar(self):
+        if self._tarea_tick:
+            self._tarea_tick.cancel()
+            try:
+                await self._tarea_tick
+            except asyncio.CancelledError:
+                pass
+            self._tarea_tick = None
+        for sala_id in list(self._buffers):
+            self._vaciar_sala(sala_id)
+
+    # ======================================================
+    # ================   MÉTRICAS   ========================
+    # ======================================================
+    def registrar_latencia(self, sala_id: str, segundos: float):
+        self._latencias.setdefault(sala_id, HistogramaLatencia()).registrar(segundos)
+
+    def metricas(self) -> dict:
+        return {
+            "expulsados": self.expulsados,
+            "conexiones": sum(len(c) for c in self.conexiones.values()),
+            "pendientes": sum(c.pendientes for lista in self.conexiones.values() for c in lista),
+            "descartados": sum(c.descartados for lista in self.conexiones.values() for c in lista),
+            "coalescidos": sum(c.coalescidos for lista in self.conexiones.values() for c in lista),
+            "salas": {sala_id: h.resumen() for sala_id, h in self._latencias.items()},
+            "bus": self.bus.metricas(),
+            "tick": {
+                "hz": self.tick_hz,
+                "ticks": self.ticks,
+                "eventos_agregados": self.eventos_agregados,
+                "mensajes_agregados": self.mensajes_agregados,
+                "duracion": self._duracion_tick.resumen(),
+            },
+        }